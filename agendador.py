@@ -0,0 +1,147 @@
+"""
+Agendador de tarefas em grafo de dependências (DAG).
+
+As etapas de uma tentativa são descritas como tarefas com dependências e
+executadas em paralelo sempre que as dependências permitem. O prazo de
+cada tarefa é a sua parcela do tempo restante ao longo do caminho crítico
+que ainda falta percorrer a partir dela.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from prazos import Prazo
+
+
+class Tarefa(NamedTuple):
+    """
+    Nó do grafo de execução.
+
+    Attributes:
+        nome: Identificador único da tarefa
+        funcao: Chamada como funcao(entradas, prazo), onde `entradas` mapeia
+            o nome de cada dependência ao seu resultado
+        dependencias: Nomes das tarefas que precisam terminar antes
+        peso: Parcela relativa do prazo destinada à tarefa
+    """
+    nome: str
+    funcao: Callable[[Dict[str, Any], Optional[Prazo]], Any]
+    dependencias: Tuple[str, ...] = ()
+    peso: float = 1.0
+
+
+def _validar(tarefas: List[Tarefa]) -> Dict[str, Tarefa]:
+    """
+    Indexa as tarefas por nome, conferindo dependências e ausência de ciclos.
+
+    Raises:
+        ValueError: Se houver nome repetido, dependência desconhecida ou ciclo
+    """
+    por_nome: Dict[str, Tarefa] = {}
+    for t in tarefas:
+        if t.nome in por_nome:
+            raise ValueError(f"Tarefa repetida: '{t.nome}'")
+        por_nome[t.nome] = t
+    for t in tarefas:
+        for d in t.dependencias:
+            if d not in por_nome:
+                raise ValueError(f"Tarefa '{t.nome}' depende de '{d}', que não existe")
+
+    visitando, concluidas = set(), set()
+
+    def visitar(nome: str):
+        if nome in concluidas:
+            return
+        if nome in visitando:
+            raise ValueError(f"Ciclo de dependências envolvendo '{nome}'")
+        visitando.add(nome)
+        for d in por_nome[nome].dependencias:
+            visitar(d)
+        visitando.discard(nome)
+        concluidas.add(nome)
+
+    for nome in por_nome:
+        visitar(nome)
+    return por_nome
+
+
+def _caminhos_restantes(por_nome: Dict[str, Tarefa]) -> Dict[str, float]:
+    """
+    Peso do caminho mais longo que começa em cada tarefa (inclusive).
+    """
+    dependentes: Dict[str, List[str]] = {n: [] for n in por_nome}
+    for t in por_nome.values():
+        for d in t.dependencias:
+            dependentes[d].append(t.nome)
+
+    memo: Dict[str, float] = {}
+
+    def caminho(nome: str) -> float:
+        if nome not in memo:
+            memo[nome] = por_nome[nome].peso + max(
+                (caminho(s) for s in dependentes[nome]), default=0.0)
+        return memo[nome]
+
+    return {n: caminho(n) for n in por_nome}
+
+
+def executar_grafo(tarefas: List[Tarefa], prazo: Optional[Prazo] = None,
+                   max_workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Executa as tarefas respeitando as dependências, em paralelo quando possível.
+
+    Cada tarefa começa assim que todas as suas dependências terminam. Com
+    `prazo`, a tarefa recebe a fração peso / (caminho crítico restante) do
+    tempo que ainda sobra, de modo que as sobras de tarefas anteriores são
+    redistribuídas, como na divisão sequencial das etapas. Se uma tarefa
+    falhar, os prazos das que ainda rodam são cancelados, abortando suas
+    chamadas ao LLM.
+
+    Args:
+        tarefas: Lista de tarefas (qualquer ordem)
+        prazo: Prazo total da execução (opcional)
+        max_workers: Limite de tarefas simultâneas (padrão: número de tarefas)
+
+    Returns:
+        Dict nome da tarefa -> resultado
+
+    Raises:
+        ValueError: Se o grafo for inválido
+        Exception: A primeira exceção levantada por uma tarefa; tarefas que
+            ainda não começaram são canceladas e as em andamento, avisadas
+            pelo prazo
+    """
+    por_nome = _validar(tarefas)
+    caminhos = _caminhos_restantes(por_nome)
+    # Prazo próprio do grafo: cancelá-lo não afeta o prazo de quem chamou
+    prazo = Prazo(prazo.restante(), pai=prazo) if prazo else None
+    resultados: Dict[str, Any] = {}
+    pendentes = dict(por_nome)
+    em_execucao = {}
+
+    executor = ThreadPoolExecutor(max_workers=max_workers or max(1, len(tarefas)),
+                                  thread_name_prefix="tarefa")
+    try:
+        while pendentes or em_execucao:
+            prontas = [t for t in pendentes.values()
+                       if all(d in resultados for d in t.dependencias)]
+            for t in prontas:
+                del pendentes[t.nome]
+                prazo_tarefa = prazo.fracao(t.peso / caminhos[t.nome]) if prazo else None
+                entradas = {d: resultados[d] for d in t.dependencias}
+                em_execucao[executor.submit(t.funcao, entradas, prazo_tarefa)] = t.nome
+
+            concluidos, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+            for futuro in concluidos:
+                nome = em_execucao.pop(futuro)
+                resultados[nome] = futuro.result()
+    finally:
+        # Não espera tarefas em andamento após um erro: o cancelamento do
+        # prazo as encerra sem esperar o fim de seus próprios prazos
+        for futuro in em_execucao:
+            futuro.cancel()
+        if em_execucao and prazo is not None:
+            prazo.cancelar()
+        executor.shutdown(wait=False)
+
+    return resultados
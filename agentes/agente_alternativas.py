@@ -2,8 +2,6 @@
 Agente Alternativas - Gera alternativas erradas (distratores) plausíveis.
 """
 
-import re
-import json
 import random
 from typing import Dict, List, Optional
 import sys
@@ -11,41 +9,50 @@ from pathlib import Path
 
 # Adiciona pasta pai ao path para importar utils
 sys.path.append(str(Path(__file__).parent.parent))
-from utils import normalize_space, split_value_unit, same_value, perturb_value, clean_json_markdown
+from utils import chave_valor, split_value_unit, same_value, perturb_value, extrair_json
+from prazos import Prazo, invocar_llm
+from .distratores import gerar_distratores
 
 
 class AgenteAlternativas:
     """
     Gera alternativas de múltipla escolha com distratores plausíveis.
     
-    Usa LLM para gerar distratores e fallback matemático se necessário.
+    Usa um motor de regras baseado em erros típicos de alunos, opcionalmente
+    o LLM para completar, e fallback matemático se necessário.
     """
     
-    def __init__(self, llm, seed: Optional[int] = None):
+    def __init__(self, llm=None, seed: Optional[int] = None, usar_llm: bool = False):
         """
         Inicializa o agente de alternativas.
         
         Args:
-            llm: Modelo LLM configurado
+            llm: Modelo LLM configurado (opcional)
             seed: Seed para reprodutibilidade do embaralhamento (opcional)
+            usar_llm: Se True, consulta o LLM quando as regras geram menos de 3 distratores
         """
         self.llm = llm
+        self.usar_llm = usar_llm
         self.seed = seed
         self.rng = random.Random()
         if self.seed is not None:
             self.rng.seed(self.seed)
 
-    def criar_alternativas(self, enunciado: str, resposta_correta: str, habilidade: Dict) -> Dict:
+    def _distratores_llm(self, enunciado: str, resposta_correta: str,
+                         prazo: Optional[Prazo] = None) -> List[str]:
         """
-        Cria 4 alternativas (A, B, C, D) sendo 1 correta e 3 distratores.
+        Pede distratores ao LLM.
         
         Args:
             enunciado: Texto da questão
             resposta_correta: Resposta correta calculada
-            habilidade: Dict com informações BNCC
+            prazo: Prazo para a chamada ao LLM (opcional)
             
         Returns:
-            Dict com chaves 'A', 'B', 'C', 'D' e 'gabarito'
+            Lista de distratores (vazia se o JSON for inválido)
+            
+        Raises:
+            PrazoExcedido: Se o prazo terminar antes da resposta do LLM
         """
         prompt = f"""
 Você é um gerador de alternativas de múltipla escolha.
@@ -74,23 +81,41 @@ EXEMPLO DE SAÍDA (apenas JSON):
 }}
 """.strip()
 
-        # Tenta obter distratores do LLM
-        linhas = []
         try:
-            resp = self.llm.invoke(prompt)
-            texto = getattr(resp, "content", str(resp))
+            texto = invocar_llm(self.llm, prompt, prazo, etapa="alternativas")
+            dados = extrair_json(texto, {"distratores": list}, origem="alternativas")
+            return [str(d).strip(" -•\t") for d in dados["distratores"]]
+
+        except ValueError as e:
+            print(f"  ⚠️  Aviso (AgenteAlternativas): Falha ao parsear JSON do LLM. Acionando fallback. Erro: {e}")
+            return []
+
+    def criar_alternativas(self, enunciado: str, resposta_correta: str, habilidade: Dict,
+                           prazo: Optional[Prazo] = None) -> Dict:
+        """
+        Cria 4 alternativas (A, B, C, D) sendo 1 correta e 3 distratores.
+        
+        Args:
+            enunciado: Texto da questão
+            resposta_correta: Resposta correta calculada
+            habilidade: Dict com informações BNCC
+            prazo: Prazo para a chamada ao LLM, se usado (opcional)
             
-            t = clean_json_markdown(texto)
-            dados = json.loads(t)
+        Returns:
+            Dict com chaves 'A', 'B', 'C', 'D' e 'gabarito'
             
-            if isinstance(dados.get("distratores"), list):
-                linhas = [str(d).strip(" -•\t") for d in dados["distratores"]]
-            else:
-                raise ValueError("Chave 'distratores' ausente ou não é uma lista.")
+        Raises:
+            PrazoExcedido: Se o prazo terminar antes da resposta do LLM
+        """
+        # Distratores a partir de erros típicos da habilidade
+        erros = gerar_distratores(enunciado, resposta_correta, habilidade.get('codigo', ''))
+        linhas = [texto for texto, _ in erros]
+        if erros:
+            print("  🧩 Distratores por regras: " + "; ".join(f"{t} ({m})" for t, m in erros))
 
-        except (json.JSONDecodeError, ValueError, AttributeError) as e:
-            print(f"  ⚠️  Aviso (AgenteAlternativas): Falha ao parsear JSON do LLM. Acionando fallback. Erro: {e}")
-            linhas = []
+        # Completa com o LLM, se habilitado
+        if len(linhas) < 3 and self.usar_llm and self.llm is not None:
+            linhas += self._distratores_llm(enunciado, resposta_correta, prazo)
 
         # Filtra duplicatas e valores iguais à correta
         vistas = set()
@@ -98,7 +123,7 @@ EXEMPLO DE SAÍDA (apenas JSON):
         for l in linhas:
             if same_value(l, resposta_correta):
                 continue
-            key = normalize_space(l)
+            key = chave_valor(l)
             if key and key not in vistas:
                 vistas.add(key)
                 alts.append(l)
@@ -126,16 +151,16 @@ EXEMPLO DE SAÍDA (apenas JSON):
                 if len(alts) == 3:
                     break
                 sug = perturb_value(val, uni, delta)
-                if not same_value(sug, resposta_correta) and normalize_space(sug) not in vistas:
-                    vistas.add(normalize_space(sug))
+                if not same_value(sug, resposta_correta) and chave_valor(sug) not in vistas:
+                    vistas.add(chave_valor(sug))
                     alts.append(sug)
 
         # Preenche com placeholders se ainda faltar
         while len(alts) < 3:
             val, uni = split_value_unit(resposta_correta)
             placeholder = perturb_value(val, uni, (len(alts) + 1) * 0.33)
-            if not same_value(placeholder, resposta_correta) and normalize_space(placeholder) not in vistas:
-                vistas.add(normalize_space(placeholder))
+            if not same_value(placeholder, resposta_correta) and chave_valor(placeholder) not in vistas:
+                vistas.add(chave_valor(placeholder))
                 alts.append(placeholder)
             else:
                 alts.append(f"Valor {len(alts)+1}")
@@ -4,13 +4,15 @@ Agente Calculador - Resolve questões matemáticas e gera resolução passo a pa
 
 import json
 import re
-from typing import Dict
+from typing import Dict, List, Optional
 import sys
 from pathlib import Path
 
 # Adiciona pasta pai ao path para importar utils
 sys.path.append(str(Path(__file__).parent.parent))
-from utils import clean_json_markdown
+from utils import extrair_json
+from prazos import Prazo, invocar_llm
+from exemplares import bloco_exemplos
 
 
 class AgenteCalculador:
@@ -20,32 +22,60 @@ class AgenteCalculador:
     Recebe enunciado e retorna resposta correta com cálculos detalhados.
     """
     
-    def __init__(self, llm):
+    # Chaves e tipos exigidos na saída do LLM
+    ESQUEMA = {"resolucao_passos": list, "resposta_correta": (str, int, float)}
+    
+    def __init__(self, llm, limite_exemplos: int = 1500):
         """
         Inicializa o agente calculador.
         
         Args:
             llm: Modelo LLM configurado (preferencialmente com format="json")
+            limite_exemplos: Máximo de caracteres de exemplos no prompt
         """
         self.llm = llm
+        self.limite_exemplos = limite_exemplos
+    
+    def _exemplos(self, exemplares: List[Dict]) -> str:
+        """
+        Formata resoluções aprovadas no mesmo JSON pedido ao LLM.
+        
+        Args:
+            exemplares: Questões aprovadas (enunciado, resolucao, gabarito_texto)
+            
+        Returns:
+            Bloco de exemplos para o prompt ("" se não houver)
+        """
+        itens = []
+        for e in exemplares:
+            saida = json.dumps({"resolucao_passos": e['resolucao'].split("\n"),
+                                "resposta_correta": e['gabarito_texto']}, ensure_ascii=False)
+            itens.append(f"ENUNCIADO: {e['enunciado']}\nSAÍDA: {saida}")
+        exemplos = bloco_exemplos(itens, self.limite_exemplos)
+        if not exemplos:
+            return ""
+        return "\nExemplos de resoluções aprovadas de questões parecidas (siga o mesmo formato):\n" + exemplos + "\n"
     
-    def calcular_resposta(self, enunciado: str, habilidade: Dict) -> Dict:
+    def calcular_resposta(self, enunciado: str, habilidade: Dict, prazo: Optional[Prazo] = None,
+                          exemplares: Optional[List[Dict]] = None) -> Dict:
         """
         Calcula a resposta para uma questão matemática.
         
         Args:
             enunciado: Texto da questão
             habilidade: Dicionário com informações da habilidade BNCC
+            prazo: Prazo para a chamada ao LLM (opcional)
+            exemplares: Questões aprovadas parecidas, usadas como few-shot (opcional)
             
         Returns:
             Dict com 'resolucao' (str) e 'resposta_correta' (str)
             
         Raises:
-            ValueError: Se JSON retornado for inválido
-            json.JSONDecodeError: Se não conseguir parsear resposta
+            ValueError: Se não houver JSON recuperável na resposta
+            PrazoExcedido: Se o prazo terminar antes da resposta
         """
         prompt = f"""Resolva a questão de matemática apresentada abaixo.
-
+{self._exemplos(exemplares or [])}
 ENUNCIADO: {enunciado}
 
 Regras obrigatórias:
@@ -66,19 +96,13 @@ Formato de saída esperado:
 }}
 """
 
-        resposta = self.llm.invoke(prompt)
-        texto_json = getattr(resposta, 'content', str(resposta))
+        texto_json = invocar_llm(self.llm, prompt, prazo, etapa="calculador")
 
         try:
-            # Limpar cercas de markdown, se houver
-            t = clean_json_markdown(texto_json)
-            dados = json.loads(t)
-
-            # Validações mínimas
-            if "resolucao_passos" not in dados or "resposta_correta" not in dados:
-                raise ValueError("JSON de saída não contém 'resolucao_passos' ou 'resposta_correta'.")
+            # Extrai o objeto JSON, reparando defeitos comuns da saída
+            dados = extrair_json(texto_json, self.ESQUEMA, origem="calculador")
 
-            if not isinstance(dados["resolucao_passos"], list) or not all(isinstance(x, str) for x in dados["resolucao_passos"]):
+            if not all(isinstance(x, str) for x in dados["resolucao_passos"]):
                 raise ValueError("'resolucao_passos' deve ser uma lista de strings.")
 
             # Saneamento: remove vazios e normaliza "Passo X:"
@@ -103,7 +127,7 @@ Formato de saída esperado:
                 "resposta_correta": resposta_final
             }
 
-        except (json.JSONDecodeError, ValueError) as e:
+        except ValueError as e:
             print(f"  ❌ Erro de JSON no Calculador: {e}")
             print(f"  Saída recebida: {texto_json[:200]}...")
             raise e
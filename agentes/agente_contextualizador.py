@@ -2,7 +2,14 @@
 Agente Contextualizador - Cria enunciados contextualizados para questões.
 """
 
-from typing import Dict
+from typing import Dict, List, Optional
+import sys
+from pathlib import Path
+
+# Adiciona pasta pai ao path para importar prazos
+sys.path.append(str(Path(__file__).parent.parent))
+from prazos import Prazo, invocar_llm
+from exemplares import bloco_exemplos
 
 
 class AgenteContextualizador:
@@ -12,25 +19,39 @@ class AgenteContextualizador:
     Gera textos de questões adequados ao ano escolar e contexto cotidiano.
     """
     
-    def __init__(self, llm):
+    def __init__(self, llm, limite_exemplos: int = 1200):
         """
         Inicializa o agente contextualizador.
         
         Args:
             llm: Modelo LLM para geração de texto
+            limite_exemplos: Máximo de caracteres de exemplos no prompt
         """
         self.llm = llm
+        self.limite_exemplos = limite_exemplos
     
-    def criar_contexto(self, habilidade: Dict) -> str:
+    def criar_contexto(self, habilidade: Dict, prazo: Optional[Prazo] = None,
+                       exemplares: Optional[List[Dict]] = None) -> str:
         """
         Cria o enunciado de uma questão matemática.
         
         Args:
             habilidade: Dict com 'descricao', 'ano' e 'codigo' da BNCC
+            prazo: Prazo para a chamada ao LLM (opcional)
+            exemplares: Questões já aprovadas da habilidade, usadas como
+                referência de estilo e nível (opcional)
             
         Returns:
             String com o enunciado da questão
+            
+        Raises:
+            PrazoExcedido: Se o prazo terminar antes da resposta
         """
+        exemplos = bloco_exemplos([e['enunciado'] for e in exemplares or []], self.limite_exemplos)
+        if exemplos:
+            exemplos = ("\nENUNCIADOS JÁ APROVADOS PARA ESTA HABILIDADE (referência de nível e clareza; "
+                        "NÃO copie, crie outro contexto e outros números):\n" + exemplos + "\n")
+        
         prompt = f"""Crie apenas o ENUNCIADO de uma questão de matemática alinhada à habilidade abaixo.
 
 HABILIDADE (BNCC): {habilidade['descricao']}
@@ -44,11 +65,9 @@ REQUISITOS:
 - O enunciado deve ter entre 2 e 3 linhas.
 - Não inclua alternativas, resolução ou resposta.
 - O problema deve ser possível de resolver com base apenas na informação dada.
-
+{exemplos}
 Saída esperada: apenas o texto do enunciado.
 """
         
-        resposta = self.llm.invoke(prompt)
-        if hasattr(resposta, 'content'):
-            return resposta.content.strip()
-        return str(resposta).strip()
+        resposta = invocar_llm(self.llm, prompt, prazo, etapa="contextualizador")
+        return resposta.strip()
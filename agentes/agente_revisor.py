@@ -4,32 +4,38 @@ Agente Revisor - Valida questões completas antes de aprovar.
 
 import json
 import re
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 import sys
 from pathlib import Path
 
 # Adiciona pasta pai ao path para importar utils
 sys.path.append(str(Path(__file__).parent.parent))
-from utils import normalize_space, split_value_unit, to_float, same_value, clean_json_markdown
+from utils import normalize_space, same_value, chave_valor, parse_quantidade, extrair_json
+from prazos import Prazo, invocar_llm
+from .verificador import verificar_resolucao
 
 
 class AgenteRevisor:
     """
     Valida questões completas verificando cálculos, alternativas e coerência.
     
-    Realiza verificações determinísticas e usa LLM para revisar cálculos.
+    Realiza verificações determinísticas, confere a aritmética dos passos e
+    só usa o LLM quando os cálculos não puderem ser conferidos mecanicamente.
     """
     
-    def __init__(self, llm, strict_json: bool = True):
+    def __init__(self, llm, strict_json: bool = True, verificar_aritmetica: bool = True):
         """
         Inicializa o agente revisor.
         
         Args:
             llm: Modelo LLM configurado (preferencialmente JSON mode)
             strict_json: Se True, exige JSON válido do LLM
+            verificar_aritmetica: Se True, aprova/reprova sem o LLM quando a
+                verificação aritmética dos passos for conclusiva
         """
         self.llm = llm
         self.strict_json = strict_json
+        self.verificar_aritmetica = verificar_aritmetica
 
     def _precheck(self, questao: Dict) -> Optional[Dict]:
         """
@@ -46,8 +52,8 @@ class AgenteRevisor:
         resolucao = questao['resolucao']
         gabarito_texto = questao['gabarito_texto']
 
-        # 1) Verifica duplicatas
-        alternativas_valores = [alt['A'], alt['B'], alt['C'], alt['D']]
+        # 1) Verifica duplicatas (valores equivalentes, ex.: "1/2" e "0,5", contam como iguais)
+        alternativas_valores = [chave_valor(alt[l]) for l in ['A', 'B', 'C', 'D']]
         if len(set(alternativas_valores)) < 4:
             return {"status": "REPROVADA",
                     "detalhes": "ERRO: Alternativas duplicadas detectadas. Todas devem ser diferentes."}
@@ -65,9 +71,9 @@ class AgenteRevisor:
                     "detalhes": f"ERRO: Valor do gabarito ({valor_gabarito}) não confere com gabarito_texto ({gabarito_texto})."}
 
         # 4) Unidade consistente
-        _, u1 = split_value_unit(valor_gabarito)
-        _, u2 = split_value_unit(gabarito_texto)
-        if u1 and u2 and normalize_space(u1).rstrip('s') != normalize_space(u2).rstrip('s'):
+        q1, q2 = parse_quantidade(valor_gabarito), parse_quantidade(gabarito_texto)
+        u1, u2 = (q1.unidade if q1 else ""), (q2.unidade if q2 else "")
+        if u1 and u2 and u1 != u2:
             return {"status": "REPROVADA",
                     "detalhes": f"ERRO: Unidade inconsistente entre gabarito ({u1}) e gabarito_texto ({u2})."}
 
@@ -78,18 +84,24 @@ class AgenteRevisor:
 
         return None
 
-    def _build_prompt(self, questao: Dict, habilidade: Dict) -> str:
+    def _build_prompt(self, questao: Dict, habilidade: Dict,
+                      pendentes: Optional[List[str]] = None) -> str:
         """
         Constrói prompt para o LLM revisar a questão.
         
         Args:
             questao: Dicionário com questão completa
             habilidade: Dict com informações BNCC
+            pendentes: Cálculos que a verificação aritmética não conseguiu conferir
             
         Returns:
             String com prompt formatado
         """
         alt = questao['alternativas']
+        foco = ""
+        if pendentes:
+            foco = "\nATENÇÃO: confira com cuidado estes cálculos, que não puderam ser verificados automaticamente:\n"
+            foco += "\n".join(f"- {p}" for p in pendentes) + "\n"
         return f"""Você é um revisor matemático.
 
 ENUNCIADO: {questao['enunciado']}
@@ -105,7 +117,7 @@ C) {alt['C']}
 D) {alt['D']}
 
 GABARITO: {alt.get('gabarito')}
-
+{foco}
 TAREFA:
 1. Refaça os cálculos de forma independente.
 2. Diga qual alternativa corresponde ao resultado correto.
@@ -124,7 +136,7 @@ SAÍDA (JSON válido, sem texto fora do JSON):
 
     def _parse_llm_json(self, raw: str) -> Optional[Dict]:
         """
-        Parseia JSON retornado pelo LLM.
+        Parseia JSON retornado pelo LLM, reparando defeitos comuns.
         
         Args:
             raw: String com resposta do LLM
@@ -132,33 +144,147 @@ SAÍDA (JSON válido, sem texto fora do JSON):
         Returns:
             Dict parseado ou None se falhar
         """
-        t = clean_json_markdown(raw)
         try:
-            data = json.loads(t)
-            return data
-        except Exception:
+            return extrair_json(raw, {"status": str}, origem="revisor")
+        except ValueError:
             return None
 
-    def revisar(self, questao_completa: Dict, habilidade: Dict) -> Dict:
+    def resolver(self, enunciado: str, habilidade: Dict, prazo: Optional[Prazo] = None) -> Optional[Dict]:
+        """
+        Resolve o enunciado de forma independente, sem ver a resposta do calculador.
+        
+        Depende apenas do enunciado, por isso pode rodar em paralelo com o
+        calculador e as alternativas; o resultado é usado em `revisar`.
+        
+        Args:
+            enunciado: Texto da questão
+            habilidade: Dict com informações BNCC
+            prazo: Prazo para a chamada ao LLM (opcional)
+            
+        Returns:
+            Dict com 'calculos' e 'resposta_revisor', ou None se a saída for inválida
+            
+        Raises:
+            PrazoExcedido: Se o prazo terminar antes da resposta do LLM
+        """
+        prompt = f"""Você é um revisor matemático.
+
+ENUNCIADO: {enunciado}
+
+TAREFA:
+Resolva a questão de forma independente, conferindo cada cálculo.
+
+SAÍDA (JSON válido, sem texto fora do JSON):
+{{
+  "calculos": "Passo 1...\\nPasso 2...",
+  "resposta_revisor": "[valor com unidade, se aplicável]"
+}}
+""".strip()
+        texto = invocar_llm(self.llm, prompt, prazo, etapa="resolucao_independente")
+        try:
+            return extrair_json(texto, {"resposta_revisor": (str, int, float)},
+                                origem="resolucao_independente")
+        except ValueError:
+            return None
+
+    def revisar_deterministico(self, questao_completa: Dict) -> Dict:
+        """
+        Revisa uma questão apenas com as verificações determinísticas.
+        
+        Usado para questões derivadas de outra já aprovada pelo LLM
+        (ex.: variantes numéricas), em que o raciocínio não mudou. Sem o
+        LLM, só a verificação aritmética conclusiva aprova: a inconclusiva
+        reprova.
+        
+        Args:
+            questao_completa: Dict com enunciado, alternativas, resolução, gabarito
+            
+        Returns:
+            Dict com 'status' ("APROVADA" ou "REPROVADA") e 'detalhes'
+        """
+        fail = self._precheck(questao_completa)
+        if fail:
+            return fail
+        
+        verificacao = verificar_resolucao(questao_completa['enunciado'],
+                                          questao_completa['resolucao'],
+                                          questao_completa['gabarito_texto'])
+        if verificacao["conclusao"] != "APROVADA":
+            return {"status": "REPROVADA",
+                    "detalhes": f"ERRO: {verificacao['motivo']}"}
+        return {"status": "APROVADA",
+                "detalhes": "Aprovada por verificação determinística."}
+
+    def revisar(self, questao_completa: Dict, habilidade: Dict, prazo: Optional[Prazo] = None,
+                resolucao_independente: Optional[Dict] = None) -> Dict:
         """
         Revisa uma questão completa.
         
         Args:
             questao_completa: Dict com enunciado, alternativas, resolução, gabarito
             habilidade: Dict com informações BNCC
+            prazo: Prazo para a chamada ao LLM (opcional)
+            resolucao_independente: Saída de `resolver` para o mesmo enunciado
+                (opcional); valor igual ao do gabarito aprova e valor
+                diferente reprova, sem chamar o LLM; só a unidade diferente
+                ou resposta ilegível segue para a revisão normal
             
         Returns:
             Dict com 'status' ("APROVADA" ou "REPROVADA") e 'detalhes'
+            
+        Raises:
+            PrazoExcedido: Se o prazo terminar antes da resposta do LLM
         """
         # Pré-checagens determinísticas
         fail = self._precheck(questao_completa)
         if fail:
             return fail
 
+        # Verificação aritmética dos passos: um cálculo errado reprova
+        verificacao, pendentes = None, None
+        if self.verificar_aritmetica:
+            verificacao = verificar_resolucao(questao_completa['enunciado'],
+                                              questao_completa['resolucao'],
+                                              questao_completa['gabarito_texto'])
+            if verificacao["conclusao"] == "REPROVADA":
+                return {"status": "REPROVADA",
+                        "detalhes": f"ERRO: {verificacao['motivo']}"}
+            pendentes = verificacao["nao_verificados"]
+
+        # Resolução independente já disponível: valor numérico divergente
+        # reprova, mesmo que a aritmética dos passos confira. Unidade escrita
+        # de outro jeito ("7" vs "7 maçãs") ou resposta sem valor legível não
+        # decide: segue para o verificador e o LLM
+        if resolucao_independente:
+            resposta = str(resolucao_independente["resposta_revisor"]).strip()
+            gabarito_texto = questao_completa['gabarito_texto']
+            qr, qg = parse_quantidade(resposta), parse_quantidade(gabarito_texto)
+            if qr is not None and qg is not None:
+                if (qr.valor, qr.radicando) != (qg.valor, qg.radicando):
+                    return {"status": "REPROVADA",
+                            "detalhes": f"ERRO: Resolução independente ({resposta}) difere do gabarito ({gabarito_texto})."}
+                if qr.unidade == qg.unidade:
+                    print("  🔁 Resolução independente confere com o gabarito")
+                    dados = dict(resolucao_independente, verificacao="resolucao_independente")
+                    return {"status": "APROVADA",
+                            "detalhes": json.dumps(dados, ensure_ascii=False, indent=2)}
+            print("  🔁 Resolução independente inconclusiva: seguindo com a revisão")
+
+        # Sem resolução independente: aritmética conferida dispensa o LLM
+        if verificacao is not None and verificacao["conclusao"] == "APROVADA":
+            print("  🧮 Aritmética conferida: revisão do LLM dispensada")
+            return {
+                "status": "APROVADA",
+                "detalhes": json.dumps({
+                    "verificacao": "deterministica",
+                    "calculos": verificacao["verificados"],
+                    "motivo": verificacao["motivo"]
+                }, ensure_ascii=False, indent=2)
+            }
+
         # Prompt ao LLM
-        prompt = self._build_prompt(questao_completa, habilidade)
-        resp = self.llm.invoke(prompt)
-        texto = getattr(resp, "content", str(resp)).strip()
+        prompt = self._build_prompt(questao_completa, habilidade, pendentes)
+        texto = invocar_llm(self.llm, prompt, prazo, etapa="revisor").strip()
 
         data = self._parse_llm_json(texto)
         if not data:
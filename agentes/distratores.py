@@ -0,0 +1,412 @@
+"""
+Motor de distratores - Gera alternativas erradas a partir de erros típicos.
+
+Cada habilidade BNCC tem regras que reproduzem equívocos comuns de alunos
+(usar só o numerador, dividir em vez de multiplicar, aplicar a porcentagem
+sobre a base errada, errar o sinal ao isolar x...). As regras usam os números
+do enunciado e a resposta correta; o resultado é determinístico e não
+depende do LLM.
+"""
+
+import re
+from fractions import Fraction
+from itertools import permutations
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import sys
+from pathlib import Path
+
+# Adiciona pasta pai ao path para importar utils
+sys.path.append(str(Path(__file__).parent.parent))
+from utils import MILHAR, RE_MILHAR, numero_para_fracao
+
+
+class Numero(NamedTuple):
+    """Número encontrado no enunciado."""
+    valor: Fraction
+    tipo: str  # 'inteiro', 'decimal', 'fracao' ou 'percentual'
+
+
+_RE_NUMERO = re.compile(
+    r'(?<![\d/])(?P<num>\d+)\s*/\s*(?P<den>\d+)(?![\d/])'
+    r'|(?P<milhar>' + MILHAR + r')(?!\d)(?P<pct1>\s*%|\s+por\s+cento)?'
+    r'|(?P<dec>\d+(?:[.,]\d+)?)(?P<pct2>\s*%|\s+por\s+cento)?',
+    flags=re.I
+)
+
+_NUMERAIS = {
+    'um': 1, 'uma': 1, 'dois': 2, 'duas': 2, 'três': 3, 'tres': 3, 'quatro': 4,
+    'cinco': 5, 'seis': 6, 'sete': 7, 'oito': 8, 'nove': 9,
+}
+_DENOMINADORES = {
+    'meio': 2, 'meios': 2, 'terço': 3, 'terços': 3, 'terco': 3, 'tercos': 3,
+    'quarto': 4, 'quartos': 4, 'quinto': 5, 'quintos': 5, 'sexto': 6, 'sextos': 6,
+    'sétimo': 7, 'sétimos': 7, 'oitavo': 8, 'oitavos': 8, 'nono': 9, 'nonos': 9,
+    'décimo': 10, 'décimos': 10, 'decimo': 10, 'decimos': 10,
+}
+_RE_FRACAO_EXTENSO = re.compile(
+    r'\b(' + '|'.join(_NUMERAIS) + r')\s+(' + '|'.join(_DENOMINADORES) + r')\b',
+    flags=re.I
+)
+_RE_METADE = re.compile(r'\bmetade\b', flags=re.I)
+_RE_VALOR_RESPOSTA = re.compile(r'[-+]?\d+\s*/\s*\d+|[-+]?' + MILHAR + r'(?!\d)|[-+]?\d+(?:[.,]\d+)?')
+
+# Limite de números do enunciado combinados entre si (evita explosão combinatória)
+_MAX_NUMEROS = 6
+
+
+def extrair_numeros(enunciado: str) -> List[Numero]:
+    """
+    Extrai os números do enunciado, sem repetição e na ordem em que aparecem.
+
+    Reconhece inteiros, decimais (vírgula ou ponto), frações ("3/4"),
+    porcentagens ("15%", "15 por cento") e frações por extenso ("dois terços",
+    "metade").
+
+    Args:
+        enunciado: Texto da questão
+
+    Returns:
+        Lista de Numero
+    """
+    achados = []
+    for m in _RE_NUMERO.finditer(enunciado or ""):
+        if m.group('num'):
+            den = int(m.group('den'))
+            if den == 0:
+                continue
+            achados.append((m.start(), Numero(Fraction(int(m.group('num')), den), 'fracao')))
+            continue
+        texto = m.group('milhar') or m.group('dec')
+        pct = m.group('pct1') or m.group('pct2')
+        valor = numero_para_fracao(texto)
+        if pct:
+            tipo = 'percentual'
+        elif valor.denominator == 1:
+            tipo = 'inteiro'
+        else:
+            tipo = 'decimal'
+        achados.append((m.start(), Numero(valor, tipo)))
+
+    for m in _RE_FRACAO_EXTENSO.finditer(enunciado or ""):
+        num = _NUMERAIS[m.group(1).lower()]
+        den = _DENOMINADORES[m.group(2).lower()]
+        achados.append((m.start(), Numero(Fraction(num, den), 'fracao')))
+    for m in _RE_METADE.finditer(enunciado or ""):
+        achados.append((m.start(), Numero(Fraction(1, 2), 'fracao')))
+
+    achados.sort(key=lambda par: par[0])
+    vistos = set()
+    numeros = []
+    for _, n in achados:
+        if n not in vistos:
+            vistos.add(n)
+            numeros.append(n)
+    return numeros
+
+
+# ---------------------------------------------------------------------------
+# Regras por habilidade. Cada regra recebe a resposta correta e os números do
+# enunciado e devolve candidatos (valor, equívoco) em ordem de prioridade.
+# ---------------------------------------------------------------------------
+
+Candidatos = List[Tuple[Fraction, str]]
+
+
+def _regras_naturais(resp: Fraction, numeros: List[Numero]) -> Candidatos:
+    """EF06MA03: troca de operação entre os números do enunciado."""
+    valores = [n.valor for n in numeros if n.tipo != 'percentual'][:_MAX_NUMEROS]
+    cands = []
+    for a, b in permutations(valores, 2):
+        ops = {
+            'soma': a + b,
+            'subtração': a - b,
+            'multiplicação': a * b,
+            'divisão': a / b if b else None,
+        }
+        if resp not in ops.values():
+            continue
+        for nome, v in ops.items():
+            if v is not None and v != resp:
+                cands.append((v, f"usou {nome} em vez da operação correta"))
+    if len(valores) > 2:
+        total = sum(valores)
+        if total != resp:
+            cands.append((total, "somou todos os números do enunciado"))
+    return cands
+
+
+def _regras_fracao_quantidade(resp: Fraction, numeros: List[Numero]) -> Candidatos:
+    """EF06MA09: fração de uma quantidade."""
+    fracoes = [n.valor for n in numeros if n.tipo == 'fracao']
+    quantidades = [n.valor for n in numeros if n.tipo in ('inteiro', 'decimal')]
+    cands = []
+    for f in fracoes:
+        n, d = f.numerator, f.denominator
+        for q in quantidades:
+            parte = q * f
+            if parte == resp:
+                cands += [
+                    (q / d, "dividiu apenas pelo denominador"),
+                    (q * n, "multiplicou apenas pelo numerador"),
+                    (q / f, "inverteu a fração"),
+                    (q - parte, "calculou a parte complementar"),
+                    (q / n if n else None, "dividiu pelo numerador"),
+                ]
+            elif q - parte == resp:
+                cands += [
+                    (parte, "calculou a parte em vez do restante"),
+                    (q - q / d, "descontou só uma parte (1/denominador)"),
+                    (q - q * n, "multiplicou apenas pelo numerador"),
+                ]
+    return [(v, m) for v, m in cands if v is not None]
+
+
+def _regras_porcentagem(resp: Fraction, numeros: List[Numero]) -> Candidatos:
+    """EF07MA02: porcentagens, acréscimos e descontos."""
+    pcts = [n.valor for n in numeros if n.tipo == 'percentual']
+    bases = [n.valor for n in numeros if n.tipo != 'percentual'][:_MAX_NUMEROS]
+    cands = []
+    for p in pcts:
+        r = p / 100
+        for v in bases:
+            parte = v * r
+            if resp == parte:
+                cands += [
+                    (v * (1 + r), "somou o acréscimo ao valor"),
+                    (v * (1 - r), "subtraiu o desconto do valor"),
+                    (v * p / 10, "errou a casa decimal da porcentagem"),
+                ]
+            elif resp == v * (1 + r):
+                cands += [
+                    (v * (1 - r), "aplicou desconto em vez de acréscimo"),
+                    (parte, "calculou apenas o acréscimo"),
+                    (v + p, "somou o percentual como valor absoluto"),
+                ]
+            elif resp == v * (1 - r):
+                cands += [
+                    (v * (1 + r), "aplicou acréscimo em vez de desconto"),
+                    (parte, "calculou apenas o desconto"),
+                    (v - p, "subtraiu o percentual como valor absoluto"),
+                ]
+            elif r != 1 and resp == v / (1 + r):
+                cands += [
+                    (v * (1 - r), "aplicou a porcentagem sobre o valor final"),
+                    (v - p, "subtraiu o percentual como valor absoluto"),
+                ]
+            elif r != 1 and resp == v / (1 - r):
+                cands += [
+                    (v * (1 + r), "aplicou a porcentagem sobre o valor final"),
+                    (v + p, "somou o percentual como valor absoluto"),
+                ]
+    # Porcentagem pedida como razão entre dois números do enunciado
+    for a, b in permutations(bases, 2):
+        if b and a * 100 / b == resp:
+            cands += [
+                (b * 100 / a if a else None, "inverteu a razão"),
+                (a * 10 / b, "errou a casa decimal da porcentagem"),
+                (b - a, "usou a diferença em vez da razão"),
+            ]
+    return [(v, m) for v, m in cands if v is not None]
+
+
+def _regras_equacao(resp: Fraction, numeros: List[Numero]) -> Candidatos:
+    """EF07MA18: equações redutíveis a ax + b = c."""
+    valores = [n.valor for n in numeros if n.tipo != 'percentual'][:_MAX_NUMEROS]
+    for a, b, c in permutations(valores, 3):
+        if a and (c - b) / a == resp:
+            return [
+                ((c + b) / a, "errou o sinal ao transpor b"),
+                (c - b, "esqueceu de dividir por a"),
+                ((c - b) * a, "multiplicou por a em vez de dividir"),
+                (c / a - b, "dividiu antes de transpor b"),
+                ((b - c) / a, "trocou o sinal do resultado"),
+            ]
+        if a and (c + b) / a == resp:
+            return [
+                ((c - b) / a, "errou o sinal ao transpor b"),
+                (c + b, "esqueceu de dividir por a"),
+                ((c + b) * a, "multiplicou por a em vez de dividir"),
+                (c / a + b, "dividiu antes de transpor b"),
+            ]
+    for a, c in permutations(valores, 2):
+        if a and c / a == resp:
+            return [
+                (c * a, "multiplicou em vez de dividir"),
+                (c - a, "subtraiu em vez de dividir"),
+                (-resp, "trocou o sinal do resultado"),
+            ]
+        if c - a == resp:
+            return [
+                (c + a, "errou o sinal ao transpor o termo"),
+                (a - c, "trocou o sinal do resultado"),
+                (c / a if a else None, "dividiu em vez de subtrair"),
+            ]
+    return []
+
+
+def _regras_potencia(resp: Fraction, numeros: List[Numero]) -> Candidatos:
+    """EF08MA02: potenciação e radiciação."""
+    valores = [n.valor for n in numeros][:_MAX_NUMEROS]
+    cands = []
+    for b, e in permutations(valores, 2):
+        if e.denominator == 1 and 1 <= e <= 10 and abs(b) <= 1000:
+            k = int(e)
+            if b ** k == resp:
+                cands += [
+                    (b * k, "multiplicou a base pelo expoente"),
+                    (b ** (k - 1), "errou o expoente (um a menos)"),
+                    (b + k, "somou base e expoente"),
+                    (b ** (k + 1), "errou o expoente (um a mais)"),
+                ]
+        elif e.denominator != 1 and b > 0:
+            p, q = e.numerator, e.denominator
+            if resp > 0 and resp ** q == b ** p:
+                cands += [
+                    (b * e, "multiplicou a base pelo expoente fracionário"),
+                    (b ** p, "ignorou o índice da raiz"),
+                    (b / q, "dividiu pelo índice em vez de extrair a raiz"),
+                ]
+    for n in valores:
+        if resp > 0 and resp ** 2 == n:
+            cands += [
+                (n / 2, "dividiu por 2 em vez de extrair a raiz quadrada"),
+                (n * 2, "multiplicou por 2 em vez de extrair a raiz"),
+            ]
+        elif resp > 0 and resp ** 3 == n:
+            cands += [
+                (n / 3, "dividiu por 3 em vez de extrair a raiz cúbica"),
+                (resp ** 2, "extraiu a raiz quadrada em vez da cúbica"),
+            ]
+    return cands
+
+
+def _regras_gerais(resp: Fraction, numeros: List[Numero]) -> Candidatos:
+    """Equívocos independentes da habilidade."""
+    return [
+        (resp * 10, "errou a posição da vírgula"),
+        (resp / 10, "errou a posição da vírgula"),
+        (resp * 2, "dobrou o resultado"),
+        (resp / 2, "dividiu o resultado por 2"),
+    ] + _regras_naturais(resp, numeros)
+
+
+REGRAS_POR_HABILIDADE = {
+    'EF06MA03': [_regras_naturais],
+    'EF06MA09': [_regras_fracao_quantidade],
+    'EF07MA02': [_regras_porcentagem],
+    'EF07MA18': [_regras_equacao],
+    'EF08MA02': [_regras_potencia],
+}
+
+# Habilidades em que resultados negativos são erros plausíveis
+_ACEITA_NEGATIVOS = {'EF07MA18'}
+
+
+def _formatar(valor: Fraction, estilo: Dict) -> Optional[str]:
+    """
+    Formata um valor no mesmo padrão da resposta correta.
+
+    Retorna None se o valor não puder ser escrito exatamente no padrão (ex.:
+    dízima periódica, ou 0,15 quando a resposta tem uma casa decimal). Se a
+    resposta for inteira, aceita até 2 casas decimais. Se a resposta separa
+    os milhares ("49.500"), o valor também os separa ("4.500", "40.500").
+    """
+    if estilo['fracao'] and valor.denominator != 1:
+        sinal = '-' if valor < 0 else ''
+        texto = f"{sinal}{abs(valor.numerator)}/{valor.denominator}"
+    else:
+        casas = estilo['casas'] or (0 if valor.denominator == 1 else 2)
+        if (valor * 10 ** casas).denominator != 1:
+            return None
+        texto = f"{float(valor):.{casas}f}"
+        if estilo['casas'] == 0 and '.' in texto:
+            texto = texto.rstrip('0').rstrip('.')
+        if estilo['milhar']:
+            inteiro, _, decimal = texto.partition('.')
+            texto = f"{int(inteiro):,}".replace(',', '.') + (f",{decimal}" if decimal else "")
+        elif estilo['virgula']:
+            texto = texto.replace('.', ',')
+    return f"{estilo['prefixo']}{texto}{estilo['sufixo']}"
+
+
+def _estilo_resposta(resposta: str) -> Optional[Tuple[Fraction, Dict]]:
+    """Extrai o valor da resposta correta e seu padrão de escrita."""
+    m = _RE_VALOR_RESPOSTA.search(resposta or "")
+    if not m:
+        return None
+    prefixo, sufixo = resposta[:m.start()], resposta[m.end():]
+    # Radicais e potências ("2√3", "√5", "2^3", "2³") não são números simples
+    if prefixo.rstrip().endswith(('√', '∛')) or sufixo.lstrip().startswith(('√', '∛', '^')) \
+            or sufixo[:1] in ('²', '³'):
+        return None
+    bruto = m.group(0).replace(' ', '')
+    valor = numero_para_fracao(bruto.lstrip('+-'))
+    if valor is None:
+        return None
+    if bruto.startswith('-'):
+        valor = -valor
+    decimais = re.search(r'[.,](\d+)$', bruto) if '/' not in bruto else None
+    milhar = RE_MILHAR.fullmatch(bruto.lstrip('+-')) is not None
+    if decimais and milhar and ',' not in bruto:
+        decimais = None
+    estilo = {
+        'prefixo': prefixo,
+        'sufixo': sufixo,
+        'fracao': '/' in bruto,
+        'virgula': ',' in bruto or '.' not in bruto,
+        'milhar': milhar,
+        'casas': len(decimais.group(1)) if decimais else 0,
+    }
+    return valor, estilo
+
+
+def gerar_distratores(enunciado: str, resposta_correta: str, codigo_bncc: str = "",
+                      quantidade: int = 3) -> List[Tuple[str, str]]:
+    """
+    Gera distratores a partir de erros típicos de alunos.
+
+    Aplica primeiro as regras da habilidade e depois as regras gerais,
+    descartando valores iguais à resposta, repetidos, não representáveis no
+    padrão da resposta ou negativos (exceto em equações). Se a resposta for
+    inteira, distratores inteiros têm preferência.
+
+    Args:
+        enunciado: Texto da questão
+        resposta_correta: Resposta correta calculada
+        codigo_bncc: Código da habilidade (ex: "EF06MA09")
+        quantidade: Número máximo de distratores
+
+    Returns:
+        Lista de (texto do distrator, equívoco que ele representa);
+        pode ter menos itens que `quantidade`.
+    """
+    parsed = _estilo_resposta(resposta_correta)
+    if not parsed:
+        return []
+    resp, estilo = parsed
+    numeros = extrair_numeros(enunciado)
+    codigo = (codigo_bncc or "").upper().strip()
+
+    candidatos = []
+    for regra in REGRAS_POR_HABILIDADE.get(codigo, []):
+        candidatos += regra(resp, numeros)
+    candidatos += _regras_gerais(resp, numeros)
+    if resp.denominator == 1:
+        # Ordenação estável: mantém a prioridade das regras entre os inteiros
+        candidatos.sort(key=lambda c: c[0].denominator != 1)
+
+    aceita_negativos = resp < 0 or codigo in _ACEITA_NEGATIVOS
+    correta = _formatar(resp, estilo)
+    vistos = {correta}
+    distratores = []
+    for valor, motivo in candidatos:
+        if valor == resp or valor == 0 or (valor < 0 and not aceita_negativos):
+            continue
+        texto = _formatar(valor, estilo)
+        if texto is None or texto in vistos:
+            continue
+        vistos.add(texto)
+        distratores.append((texto, motivo))
+        if len(distratores) == quantidade:
+            break
+    return distratores
@@ -0,0 +1,498 @@
+"""
+Verificador aritmético - Confere os cálculos dos passos sem usar o LLM.
+
+Extrai de cada "Passo X:" as cadeias de igualdade ("120 ÷ 4 = 30",
+"3x + 5 = 26", "15% de 80 = 12"), avalia cada membro com um analisador de
+expressões próprio (sem eval) em aritmética exata e confere se os membros
+são iguais. Variáveis recebem o valor atribuído no enunciado ou nos passos
+("x = 4") ou, sem atribuição, o valor do gabarito. O resultado
+diz se a resolução pode ser aprovada ou reprovada sem o LLM, ou se é
+inconclusiva.
+"""
+
+import re
+from fractions import Fraction
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+import sys
+from pathlib import Path
+
+# Adiciona pasta pai ao path para importar utils
+sys.path.append(str(Path(__file__).parent.parent))
+from utils import NUMERO, numero_para_fracao, parse_quantidade, extrair_raiz
+from .distratores import extrair_numeros
+
+
+class Lexema(NamedTuple):
+    """Unidade léxica de um passo."""
+    tipo: str   # num, hora, op, eq, lp, rp, pct, sup, raiz, var, palavra, composta, quebra
+    texto: str
+    valor: Optional[Fraction] = None
+    espaco_antes: bool = False
+
+
+_RE_PASSO = re.compile(r'^\s*Passo\s*\d+\s*:\s*', flags=re.I)
+_RE_LEXICO = re.compile(
+    r'(?P<hora>\d{1,2}:\d{2}(?!\d))'
+    r'|(?P<num>' + NUMERO + r')'
+    r'|(?P<sup>[²³])'
+    r'|(?P<pct>%)'
+    r'|(?P<op>[+\-−×*÷/^·])'
+    r'|(?P<div>(?<=\s):(?=\s))'
+    r'|(?P<lp>\()|(?P<rp>\))'
+    r'|(?P<eq>=|≈)'
+    r'|(?P<raiz>√|∛)'
+    r'|(?P<palavra>[A-Za-zÀ-ÿ]+)'
+    r'|(?P<espaco>\s+)'
+    r'|(?P<quebra>.)'
+)
+_SUBSTITUICOES = (
+    (re.compile(r'raiz\s+quadrada\s+de', re.I), '√'),
+    (re.compile(r'raiz\s+c[úu]bica\s+de', re.I), '∛'),
+    (re.compile(r'dividido\s+por', re.I), '÷'),
+    (re.compile(r'\bvezes\b', re.I), '×'),
+    (re.compile(r'\bmais\b', re.I), '+'),
+    (re.compile(r'\bmenos\b', re.I), '-'),
+    (re.compile(r'R\$\s*'), ''),
+)
+_OPS = {'+': '+', '-': '-', '−': '-', '×': '*', '*': '*', '·': '*', '÷': '/', '/': '/', ':': '/', '^': '^'}
+_VARIAVEIS = {'x', 'y'}
+_CONSTANTES = {Fraction(1), Fraction(10), Fraction(100)}
+# Palavras do enunciado que pedem uma operação nos passos ("quantas restam?")
+_PISTAS_OPERACAO = (
+    ('-', 'subtração', re.compile(
+        r'\b(?:rest(?:a|am|ou|aram)|sobr(?:a|am|ou|aram)|gast(?:a|ou|aram)|perd(?:e|eu|eram)'
+        r'|tir(?:a|ou|aram)|falt(?:a|am)|diferença|troco|a menos)\b', re.I)),
+)
+
+
+def _composta(brutos: List[Lexema], i: int) -> bool:
+    """Se brutos[i] é o 'e' de uma quantidade composta ("2 horas e 30 minutos")."""
+    return (2 <= i < len(brutos) - 1 and brutos[i].texto.lower() == 'e'
+            and brutos[i - 1].tipo == 'palavra' and brutos[i - 2].tipo == 'num'
+            and brutos[i + 1].tipo == 'num')
+
+
+def _lexemas(texto: str) -> List[Lexema]:
+    """
+    Quebra um passo em lexemas, resolvendo 'x' (variável ou vezes) e 'de'.
+
+    O 'e' de uma quantidade composta ("2 horas e 30 minutos") vira um lexema
+    'composta', que o analisador não avalia: o membro fica não verificável
+    em vez de ser cortado em "2".
+    """
+    for regex, troca in _SUBSTITUICOES:
+        texto = regex.sub(troca, texto)
+
+    brutos = []
+    espaco = False
+    for m in _RE_LEXICO.finditer(texto):
+        tipo = m.lastgroup
+        if tipo == 'espaco':
+            espaco = True
+            continue
+        if tipo == 'div':
+            tipo = 'op'
+        valor = numero_para_fracao(m.group()) if tipo == 'num' else None
+        brutos.append(Lexema(tipo, m.group(), valor, espaco))
+        espaco = False
+
+    lexemas = []
+    for i, lx in enumerate(brutos):
+        if lx.tipo != 'palavra':
+            lexemas.append(lx)
+            continue
+        ant = lexemas[-1] if lexemas else None
+        prox = brutos[i + 1] if i + 1 < len(brutos) else None
+        palavra = lx.texto.lower()
+        apos_operando = ant is not None and ant.tipo in ('num', 'hora', 'rp', 'pct', 'sup')
+        antes_operando = prox is not None and prox.tipo in ('num', 'lp', 'raiz')
+        if palavra == 'x' and apos_operando and antes_operando and lx.espaco_antes and prox.espaco_antes:
+            lexemas.append(Lexema('op', '×', None, True))
+        elif palavra in _VARIAVEIS:
+            lexemas.append(Lexema('var', palavra, None, lx.espaco_antes))
+        elif palavra == 'de' and apos_operando and antes_operando:
+            lexemas.append(Lexema('op', '×', None, True))
+        elif _composta(brutos, i):
+            lexemas.append(Lexema('composta', lx.texto, None, True))
+        elif apos_operando and lx.espaco_antes and _composta(brutos, i + 1):
+            continue  # unidade antes do 'e' de uma quantidade composta
+        elif apos_operando and lx.espaco_antes and (prox is None or prox.tipo in ('op', 'eq', 'rp', 'quebra')):
+            continue  # unidade após um número ("30 figurinhas = ...")
+        else:
+            lexemas.append(Lexema('quebra', lx.texto))
+    return lexemas
+
+
+class _Analisador:
+    """
+    Analisador descendente recursivo de uma expressão (um membro da igualdade).
+
+    Gramática: soma := produto (('+'|'-') produto)*
+               produto := unario (('*'|'/') unario | implícito)*
+               unario := ('-'|'+') unario | potencia
+               potencia := posfixo ('^' unario)?
+               posfixo := primario ('%' | '²' | '³')*
+               primario := num | var | '(' soma ')' | raiz primario
+    """
+
+    def __init__(self, lexemas: List[Lexema], variaveis: Dict[str, Optional[Fraction]]):
+        self.lx = lexemas
+        self.i = 0
+        self.variaveis = variaveis
+        self.folhas: List[Fraction] = []
+        self.usa_variavel = False
+        self.operacoes = 0
+        self.operadores: Set[str] = set()
+
+    def _atual(self) -> Optional[Lexema]:
+        return self.lx[self.i] if self.i < len(self.lx) else None
+
+    def _op(self, *simbolos) -> Optional[str]:
+        lx = self._atual()
+        if lx is not None and lx.tipo == 'op' and _OPS[lx.texto] in simbolos:
+            self.i += 1
+            return _OPS[lx.texto]
+        return None
+
+    def analisar(self) -> Optional[Fraction]:
+        """Avalia o membro inteiro; None se inválido, irracional ou sem valor."""
+        valor = self._soma()
+        if self.i != len(self.lx):
+            raise ValueError("lexemas sobrando")
+        return valor
+
+    def _soma(self):
+        valor = self._produto()
+        while True:
+            op = self._op('+', '-')
+            if not op:
+                return valor
+            direita = self._produto()
+            self.operacoes += 1
+            self.operadores.add(op)
+            valor = None if valor is None or direita is None else (
+                valor + direita if op == '+' else valor - direita)
+
+    def _produto(self):
+        valor = self._unario()
+        while True:
+            op = self._op('*', '/')
+            if not op:
+                lx = self._atual()
+                if lx is None or lx.tipo not in ('var', 'lp', 'raiz'):
+                    return valor
+                op = '*'  # multiplicação implícita: 3x, 2(4 + 1), 2√3
+            direita = self._unario()
+            self.operacoes += 1
+            self.operadores.add(op)
+            if valor is None or direita is None:
+                valor = None
+            elif op == '*':
+                valor = valor * direita
+            else:
+                if direita == 0:
+                    raise ZeroDivisionError
+                valor = valor / direita
+
+    def _unario(self):
+        op = self._op('+', '-')
+        if op:
+            valor = self._unario()
+            return None if valor is None else (-valor if op == '-' else valor)
+        return self._potencia()
+
+    def _potencia(self):
+        base = self._posfixo()
+        if self._op('^'):
+            expoente = self._unario()
+            self.operacoes += 1
+            self.operadores.add('^')
+            return self._elevar(base, expoente)
+        return base
+
+    @staticmethod
+    def _elevar(base, expoente):
+        if base is None or expoente is None or abs(expoente) > 20:
+            return None
+        if base == 0 and expoente < 0:
+            raise ZeroDivisionError
+        potencia = base ** int(expoente.numerator)
+        if expoente.denominator == 1:
+            return potencia
+        raiz, radicando = extrair_raiz(potencia, expoente.denominator)
+        return raiz if radicando == 1 else None
+
+    def _posfixo(self):
+        valor = self._primario()
+        while True:
+            lx = self._atual()
+            if lx is not None and lx.tipo == 'pct':
+                valor = None if valor is None else valor / 100
+            elif lx is not None and lx.tipo == 'sup':
+                valor = self._elevar(valor, Fraction(2 if lx.texto == '²' else 3))
+                self.operacoes += 1
+            else:
+                return valor
+            self.i += 1
+
+    def _primario(self):
+        lx = self._atual()
+        if lx is None:
+            raise ValueError("expressão incompleta")
+        self.i += 1
+        if lx.tipo == 'num':
+            self.folhas.append(lx.valor)
+            return lx.valor
+        if lx.tipo == 'var':
+            self.usa_variavel = True
+            return self.variaveis.get(lx.texto)
+        if lx.tipo == 'lp':
+            valor = self._soma()
+            fecha = self._atual()
+            if fecha is None or fecha.tipo != 'rp':
+                raise ValueError("parêntese não fechado")
+            self.i += 1
+            return valor
+        if lx.tipo == 'raiz':
+            valor = self._posfixo()
+            self.operacoes += 1
+            if valor is None:
+                return None
+            raiz, radicando = extrair_raiz(valor, 3 if lx.texto == '∛' else 2)
+            return raiz if radicando == 1 else None
+        raise ValueError(f"lexema inesperado: {lx.texto}")
+
+
+def _cadeias(lexemas: List[Lexema]) -> List[Tuple[List[List[Lexema]], List[str]]]:
+    """
+    Separa as cadeias de igualdade de um passo.
+
+    Cada cadeia é (membros, separadores): membros são listas de lexemas e
+    separadores[i] ('=' ou '≈') liga o membro i ao seguinte. Membros
+    incompletos nas pontas (ex.: começando por operador após uma palavra)
+    são descartados; sobram apenas cadeias com ao menos dois membros.
+    """
+    trechos, atual = [], []
+    for lx in lexemas + [Lexema('quebra', '')]:
+        if lx.tipo == 'quebra':
+            if any(l.tipo == 'eq' for l in atual):
+                trechos.append(atual)
+            atual = []
+        else:
+            atual.append(lx)
+
+    cadeias = []
+    for trecho in trechos:
+        membros, membro, separador = [], [], ''
+        for lx in trecho:
+            if lx.tipo == 'eq':
+                membros.append((separador, membro))
+                membro, separador = [], lx.texto
+            else:
+                membro.append(lx)
+        membros.append((separador, membro))
+
+        primeiro, ultimo = membros[0][1], membros[-1][1]
+        if primeiro and primeiro[0].tipo == 'op' and _OPS[primeiro[0].texto] != '-':
+            membros = membros[1:]
+        if membros and ultimo and ultimo[-1].tipo == 'op':
+            membros = membros[:-1]
+        membros = [(s, m) for s, m in membros if m]
+        if len(membros) >= 2:
+            cadeias.append(([m for _, m in membros], [s for s, _ in membros[1:]]))
+    return cadeias
+
+
+def _texto_cadeia(membros: List[List[Lexema]], separadores: List[str]) -> str:
+    """Reescreve a cadeia para as mensagens ("120 ÷ 4 = 30")."""
+    partes = [" ".join(l.texto for l in membros[0])]
+    for separador, membro in zip(separadores, membros[1:]):
+        partes += [separador, " ".join(l.texto for l in membro)]
+    return " ".join(partes)
+
+
+def _casas(membro: List[Lexema]) -> Optional[int]:
+    """Casas decimais de um membro que é só um número (para arredondamentos)."""
+    if len(membro) == 1 and membro[0].tipo == 'num':
+        m = re.search(r',(\d+)$', membro[0].texto) or re.search(r'\.(\d{1,2})$', membro[0].texto)
+        return len(m.group(1)) if m else 0
+    return None
+
+
+def _iguais(a: Fraction, b: Fraction, casas: Optional[int], aproximado: bool = False) -> bool:
+    """
+    Compara valores, tolerando arredondamento na precisão do membro da
+    direita quando ele tem decimais ou vem depois de '≈' ("100 ÷ 3 ≈ 33").
+    """
+    if a == b:
+        return True
+    if casas is None or not (casas or aproximado):
+        return False
+    return abs(a - b) <= Fraction(1, 2 * 10 ** casas)
+
+
+def _membros_iguais(a: Tuple, b: Tuple, casas: Optional[int], aproximado: bool = False) -> bool:
+    """
+    Compara dois membros (valor, valor sem o '%' final).
+
+    Aceita "0,25 × 100 = 25%", em que o '%' só rotula o resultado.
+    """
+    return any(_iguais(x, y, casas, aproximado) for x in a for y in b if x is not None and y is not None)
+
+
+def _atribuicao(membros: List[List[Lexema]]) -> Optional[Tuple[str, Fraction]]:
+    """Variável e valor de uma cadeia "x = 4" (ou "4 = x"); None se não for atribuição."""
+    if len(membros) != 2 or any(len(m) != 1 for m in membros):
+        return None
+    a, b = membros[0][0], membros[1][0]
+    if a.tipo == 'num':
+        a, b = b, a
+    if a.tipo == 'var' and b.tipo == 'num':
+        return a.texto, b.valor
+    return None
+
+
+def _atribuicoes_enunciado(enunciado: str) -> Dict[str, Fraction]:
+    """Valores dados às variáveis no enunciado ("... para x = 4")."""
+    atribuicoes = {}
+    for membros, _ in _cadeias(_lexemas(enunciado or "")):
+        atribuicao = _atribuicao(membros)
+        if atribuicao:
+            atribuicoes[atribuicao[0]] = atribuicao[1]
+    return atribuicoes
+
+
+def _fundamentados(enunciado: str) -> Set[Fraction]:
+    """Valores que um passo pode citar sem ter calculado antes."""
+    valores = set(_CONSTANTES)
+    for n in extrair_numeros(enunciado):
+        valores.add(n.valor)
+        if n.tipo == 'percentual':
+            valores.add(n.valor / 100)
+        if n.tipo == 'fracao':
+            valores.update({Fraction(n.valor.numerator), Fraction(n.valor.denominator)})
+    for lx in _lexemas(enunciado):
+        if lx.tipo == 'num':
+            valores.add(lx.valor)
+    return valores
+
+
+def verificar_resolucao(enunciado: str, resolucao: str, gabarito_texto: str) -> Dict:
+    """
+    Confere a aritmética da resolução e sua coerência com o gabarito.
+
+    Cálculos com relógio ("16:30 - 14:30") não são verificados. Uma cadeia
+    com variável que não confere é inconclusiva, pois o valor usado para a
+    variável pode não ser o que o passo pretendia.
+
+    Conclusões:
+    - REPROVADA: alguma igualdade sem variável está errada.
+    - APROVADA: todas as igualdades conferem, todos os números usados vêm do
+      enunciado ou de cálculos anteriores, o gabarito é o resultado final
+      (ou satisfaz a equação montada nos passos) e os passos usam as
+      operações pedidas pelo enunciado ("restam" exige uma subtração).
+    - INCONCLUSIVA: há cálculos que não puderam ser conferidos, ou os
+      cálculos conferem mas não há como confirmar que respondem à pergunta.
+
+    Args:
+        enunciado: Texto da questão
+        resolucao: Passos "Passo X: ..." do AgenteCalculador
+        gabarito_texto: Resposta correta indicada
+
+    Returns:
+        Dict com 'conclusao', 'motivo', 'verificados', 'erros' e 'nao_verificados'
+    """
+    gabarito = parse_quantidade(gabarito_texto or "")
+    valor_gabarito = gabarito.exata if gabarito is not None else None
+
+    fundamentados = _fundamentados(enunciado)
+    atribuicoes = _atribuicoes_enunciado(enunciado)
+    resultados: List[Fraction] = []
+    verificados, erros, nao_verificados, sem_origem = [], [], [], []
+    ultimo_resultado: Set[Fraction] = set()
+    operadores: Set[str] = set()
+    equacao_satisfeita = False
+
+    for n_passo, linha in enumerate((resolucao or "").split('\n'), 1):
+        corpo = _RE_PASSO.sub('', linha)
+        for membros, separadores in _cadeias(_lexemas(corpo)):
+            atribuicao = _atribuicao(membros)
+            if atribuicao:
+                # "Substituindo x = 4": vale para os cálculos seguintes
+                atribuicoes[atribuicao[0]] = atribuicao[1]
+                continue
+            texto = _texto_cadeia(membros, separadores)
+            variaveis = {v: atribuicoes.get(v, valor_gabarito) for v in _VARIAVEIS}
+            valores, folhas, usa_variavel, operacoes, usados = [], None, False, 0, set()
+            try:
+                for membro in membros:
+                    analisador = _Analisador(membro, variaveis)
+                    valor = analisador.analisar()
+                    sem_pct = None
+                    if membro[-1].tipo == 'pct' and len(membro) > 1:
+                        sem_pct = _Analisador(membro[:-1], variaveis).analisar()
+                    valores.append((valor, sem_pct))
+                    # Só o primeiro membro precisa de origem; os demais são conferidos contra ele
+                    if folhas is None:
+                        folhas = analisador.folhas
+                    usa_variavel = usa_variavel or analisador.usa_variavel
+                    operacoes += analisador.operacoes
+                    usados |= analisador.operadores
+            except (ValueError, ZeroDivisionError):
+                nao_verificados.append(f"Passo {n_passo}: {texto}")
+                continue
+            if any(v is None for v, _ in valores):
+                nao_verificados.append(f"Passo {n_passo}: {texto}")
+                continue
+
+            erro = next((i for i in range(len(valores) - 1)
+                         if not _membros_iguais(valores[i], valores[i + 1], _casas(membros[i + 1]),
+                                                separadores[i] == '≈')), None)
+            if erro is not None and usa_variavel:
+                nao_verificados.append(f"Passo {n_passo}: {texto}")
+                continue
+            if erro is not None:
+                erros.append(f"Passo {n_passo}: '{texto}' "
+                             f"({float(valores[erro][0]):g} ≠ {float(valores[erro + 1][0]):g})")
+                continue
+
+            verificados.append(f"Passo {n_passo}: {texto}")
+            operadores |= usados
+            sem_origem += [f for f in folhas if f not in fundamentados and f not in resultados]
+            if usa_variavel:
+                # O gabarito satisfaz uma equação montada com os dados ("3x + 5 = 26")
+                equacao_satisfeita = equacao_satisfeita or operacoes > 0
+            else:
+                resultados += [v for par in valores for v in par if v is not None]
+                ultimo_resultado = {v for v in valores[-1] if v is not None}
+
+    def conclusao(status, motivo):
+        return {"conclusao": status, "motivo": motivo, "verificados": verificados,
+                "erros": erros, "nao_verificados": nao_verificados}
+
+    if erros:
+        return conclusao("REPROVADA", "Cálculo incorreto: " + "; ".join(erros))
+    if not verificados:
+        return conclusao("INCONCLUSIVA", "Nenhum cálculo verificável nos passos.")
+    if nao_verificados:
+        return conclusao("INCONCLUSIVA", "Há cálculos que não puderam ser conferidos.")
+    if valor_gabarito is None:
+        return conclusao("INCONCLUSIVA", "Gabarito sem valor numérico exato.")
+
+    alvos = {valor_gabarito}
+    if gabarito.unidade == '%':
+        alvos.add(valor_gabarito / 100)
+    if sem_origem:
+        return conclusao("INCONCLUSIVA", "Números sem origem no enunciado: " +
+                         ", ".join(sorted({f"{float(f):g}" for f in sem_origem})))
+    if not (alvos & ultimo_resultado or equacao_satisfeita):
+        # Pode ser só a forma da resposta ("5/8 da pizza" após "8 - 3 = 5"): cabe ao LLM
+        return conclusao("INCONCLUSIVA", "Gabarito não é o resultado final dos passos.")
+    faltando = [nome for op, nome, pista in _PISTAS_OPERACAO
+                if op not in operadores and pista.search(enunciado or "")]
+    if faltando:
+        return conclusao("INCONCLUSIVA", "O enunciado pede " + " e ".join(faltando) +
+                         ", que não aparece nos passos.")
+    if alvos & ultimo_resultado:
+        return conclusao("APROVADA", "Todos os cálculos conferem e levam ao gabarito.")
+    return conclusao("APROVADA", "Todos os cálculos conferem e o gabarito satisfaz a equação.")
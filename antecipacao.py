@@ -0,0 +1,166 @@
+"""
+Geração antecipada (prefetch) de questões a partir da interface.
+
+Quando o usuário escolhe uma habilidade, a interface pede a antecipação e a
+geração começa em segundo plano; o `/api/gerar` seguinte do mesmo cliente
+aproveita o resultado, pronto ou em andamento. A latência percebida cai
+pelo tempo que o usuário leva para clicar.
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturoTimeout
+from typing import Callable, Dict, Optional, Tuple
+
+from prazos import PrazoExcedido
+
+
+class _Antecipacao:
+    """Geração em segundo plano de um cliente para um código BNCC."""
+
+    __slots__ = ('futuro', 'concluida')
+
+    def __init__(self, futuro: Future):
+        self.futuro = futuro
+        self.concluida: Optional[float] = None
+
+
+class Antecipador:
+    """
+    Gerencia antecipações por (cliente, código BNCC).
+
+    Cada cliente tem no máximo `max_por_cliente` antecipações; uma nova
+    desloca a mais antiga. Resultados não reclamados expiram `ttl_s`
+    segundos após concluídos. Questões aprovadas que saem sem ser usadas
+    (deslocadas ou expiradas) são entregues a `descartar`, que pode
+    guardá-las para outra requisição.
+    """
+
+    def __init__(self, gerar: Callable[[str], Dict], workers: int = 2, ttl_s: float = 120,
+                 max_por_cliente: int = 2, max_total: int = 32,
+                 descartar: Optional[Callable[[Dict], None]] = None):
+        """
+        Inicializa o antecipador.
+
+        Args:
+            gerar: Função que gera a questão de um código BNCC
+            workers: Gerações antecipadas simultâneas
+            ttl_s: Validade (s) de um resultado concluído e não reclamado
+            max_por_cliente: Antecipações guardadas por cliente
+            max_total: Antecipações guardadas no total
+            descartar: Recebe questões aprovadas não reclamadas (opcional)
+        """
+        self.gerar = gerar
+        self.ttl_s = ttl_s
+        self.max_por_cliente = max_por_cliente
+        self.max_total = max_total
+        self.descartar = descartar
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers),
+                                            thread_name_prefix="antecipacao")
+        self._antecipacoes: Dict[Tuple[str, str], _Antecipacao] = {}
+        self._lock = threading.Lock()
+        self._aproveitadas = 0
+        self._desperdicadas = 0
+
+    def _liberar(self, antecipacao: _Antecipacao):
+        """Descarta uma antecipação não reclamada, repassando o resultado se houver."""
+        self._desperdicadas += 1
+        self._repassar(antecipacao.futuro)
+
+    def _repassar(self, futuro: Future):
+        """Entrega a `descartar` o resultado aprovado de uma geração não usada."""
+        def repassar(futuro: Future):
+            if futuro.cancelled() or futuro.exception() is not None:
+                return
+            resultado = futuro.result()
+            if self.descartar and resultado.get('status') == 'sucesso':
+                self.descartar(resultado)
+
+        if not futuro.cancel():
+            futuro.add_done_callback(repassar)
+
+    def _expirar(self):
+        """Remove resultados concluídos há mais de ttl_s (chamado com o lock)."""
+        agora = time.monotonic()
+        for chave, a in list(self._antecipacoes.items()):
+            if a.concluida is not None and agora - a.concluida > self.ttl_s:
+                del self._antecipacoes[chave]
+                self._liberar(a)
+
+    def antecipar(self, cliente: str, codigo: str) -> bool:
+        """
+        Inicia (ou mantém) a geração antecipada de um código para o cliente.
+
+        Args:
+            cliente: Identificador do cliente
+            codigo: Código BNCC
+
+        Returns:
+            True se há antecipação para (cliente, codigo); False se o
+            limite total foi atingido
+        """
+        chave = (cliente, codigo)
+        with self._lock:
+            self._expirar()
+            if chave in self._antecipacoes:
+                return True
+
+            do_cliente = [k for k in self._antecipacoes if k[0] == cliente]
+            while len(do_cliente) >= self.max_por_cliente:
+                # Dicts mantêm a ordem de inserção: a primeira é a mais antiga
+                self._liberar(self._antecipacoes.pop(do_cliente.pop(0)))
+            if len(self._antecipacoes) >= self.max_total:
+                return False
+
+            antecipacao = _Antecipacao(self._executor.submit(self.gerar, codigo))
+            self._antecipacoes[chave] = antecipacao
+
+        def concluir(_):
+            antecipacao.concluida = time.monotonic()
+
+        antecipacao.futuro.add_done_callback(concluir)
+        return True
+
+    def reclamar(self, cliente: str, codigo: str, timeout: Optional[float] = None) -> Optional[Dict]:
+        """
+        Retira a antecipação de (cliente, codigo) e aguarda seu resultado.
+
+        Args:
+            cliente: Identificador do cliente
+            codigo: Código BNCC
+            timeout: Espera máxima (s) se a geração ainda estiver em andamento
+
+        Returns:
+            Resultado de `gerar`, ou None se não houver antecipação
+
+        Raises:
+            PrazoExcedido: Se o timeout acabar antes da geração (o resultado
+                posterior, se aprovado, vai para `descartar`)
+            Exception: Qualquer exceção levantada por `gerar`
+        """
+        with self._lock:
+            self._expirar()
+            antecipacao = self._antecipacoes.pop((cliente, codigo), None)
+            if antecipacao is None:
+                return None
+            self._aproveitadas += 1
+
+        try:
+            return antecipacao.futuro.result(timeout=timeout)
+        except FuturoTimeout:
+            self._repassar(antecipacao.futuro)
+            raise PrazoExcedido("antecipacao")
+
+    def metricas(self) -> Dict[str, int]:
+        """
+        Retorna contadores das antecipações.
+
+        Returns:
+            Dict com pendentes, aproveitadas e desperdiçadas
+        """
+        with self._lock:
+            return {
+                "pendentes": len(self._antecipacoes),
+                "aproveitadas": self._aproveitadas,
+                "desperdicadas": self._desperdicadas,
+            }
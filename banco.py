@@ -0,0 +1,223 @@
+"""
+Banco de questões aprovadas e exportação em JSONL, CSV e Moodle GIFT.
+
+Cada questão aprovada é anexada como uma linha JSON em um arquivo. A leitura
+e a exportação são geradores que percorrem o arquivo linha a linha, então o
+consumo de memória não depende do tamanho do banco e a saída começa a ser
+produzida imediatamente.
+"""
+
+import csv
+import io
+import json
+import re
+import threading
+import uuid
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, Iterator, Optional, Set
+
+
+ARQUIVO_PADRAO = "banco_questoes.jsonl"
+
+FORMATOS = {
+    "jsonl": ("application/x-ndjson", "jsonl"),
+    "csv": ("text/csv", "csv"),
+    "gift": ("text/plain", "gift.txt"),
+}
+
+COLUNAS_CSV = ["id", "codigo_bncc", "ano", "eixo", "criada_em", "enunciado",
+               "A", "B", "C", "D", "gabarito", "gabarito_texto", "resolucao", "variante"]
+
+_RE_ESPECIAIS_GIFT = re.compile(r'([~=#{}:\\])')
+
+
+def _digitos(ano: str) -> str:
+    """Extrai os dígitos do ano escolar (ex.: "6º ano" -> "6")."""
+    return re.sub(r'\D', '', str(ano))
+
+
+def filtros(codigo: Optional[str] = None, ano: Optional[str] = None,
+            desde: Optional[str] = None, ate: Optional[str] = None) -> Dict:
+    """
+    Converte filtros em texto (query string ou linha de comando) para `iterar`.
+
+    Args:
+        codigo: Códigos BNCC separados por vírgula (opcional)
+        ano: Ano escolar (opcional)
+        desde: Data inicial AAAA-MM-DD (opcional)
+        ate: Data final AAAA-MM-DD (opcional)
+
+    Returns:
+        Dict com os argumentos de `BancoQuestoes.iterar`
+
+    Raises:
+        ValueError: Se alguma data for inválida
+    """
+    codigos = {c.strip().upper() for c in (codigo or '').split(',') if c.strip()}
+    try:
+        return {
+            "codigos": codigos or None,
+            "ano": ano or None,
+            "desde": date.fromisoformat(desde) if desde else None,
+            "ate": date.fromisoformat(ate) if ate else None,
+        }
+    except ValueError:
+        raise ValueError("Datas devem estar no formato AAAA-MM-DD")
+
+
+class BancoQuestoes:
+    """
+    Arquivo JSONL (uma questão aprovada por linha), apenas com anexação.
+    """
+
+    def __init__(self, caminho: str = ARQUIVO_PADRAO):
+        """
+        Inicializa o banco.
+
+        Args:
+            caminho: Arquivo JSONL do banco (criado na primeira questão salva)
+        """
+        self.caminho = caminho
+        self._lock = threading.Lock()
+
+    def salvar(self, habilidade: Dict, questao: Dict, variante: bool = False) -> Dict:
+        """
+        Anexa uma questão aprovada ao banco.
+
+        Args:
+            habilidade: Dict com informações BNCC
+            questao: Dict com enunciado, alternativas, resolucao e gabarito_texto
+            variante: Se a questão é uma variante numérica
+
+        Returns:
+            Registro gravado (com 'id' e 'criada_em')
+        """
+        alternativas = questao['alternativas']
+        registro = {
+            "id": uuid.uuid4().hex,
+            "criada_em": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            "codigo_bncc": habilidade['codigo'],
+            "ano": habilidade.get('ano', ''),
+            "eixo": habilidade.get('eixo', ''),
+            "enunciado": questao['enunciado'],
+            "alternativas": {l: alternativas[l] for l in ['A', 'B', 'C', 'D']},
+            "gabarito": alternativas.get('gabarito'),
+            "gabarito_texto": questao['gabarito_texto'],
+            "resolucao": questao['resolucao'],
+            "variante": variante,
+        }
+        linha = json.dumps(registro, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.caminho, 'a', encoding='utf-8') as f:
+                f.write(linha)
+        return registro
+
+    def iterar(self, codigos: Optional[Set[str]] = None, ano: Optional[str] = None,
+               desde: Optional[date] = None, ate: Optional[date] = None) -> Iterator[Dict]:
+        """
+        Percorre as questões do banco, na ordem em que foram salvas.
+
+        Linhas corrompidas (ex.: gravação interrompida) são ignoradas.
+
+        Args:
+            codigos: Códigos BNCC aceitos (opcional)
+            ano: Ano escolar, ex.: "6" ou "6º ano" (opcional)
+            desde: Data mínima de criação, inclusive (opcional)
+            ate: Data máxima de criação, inclusive (opcional)
+
+        Yields:
+            Registros que atendem aos filtros
+        """
+        ano = _digitos(ano) if ano else None
+        desde = desde.isoformat() if desde else None
+        ate = ate.isoformat() if ate else None
+        try:
+            f = open(self.caminho, 'r', encoding='utf-8')
+        except FileNotFoundError:
+            return
+        with f:
+            for linha in f:
+                try:
+                    q = json.loads(linha)
+                except json.JSONDecodeError:
+                    continue
+                dia = q.get('criada_em', '')[:10]
+                if codigos and q.get('codigo_bncc') not in codigos:
+                    continue
+                if ano and _digitos(q.get('ano', '')) != ano:
+                    continue
+                if (desde and dia < desde) or (ate and dia > ate):
+                    continue
+                yield q
+
+
+def _jsonl(questoes: Iterable[Dict]) -> Iterator[str]:
+    """Uma questão JSON por linha."""
+    for q in questoes:
+        yield json.dumps(q, ensure_ascii=False) + "\n"
+
+
+def _csv(questoes: Iterable[Dict]) -> Iterator[str]:
+    """Cabeçalho e uma linha CSV por questão, reaproveitando um único buffer."""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+
+    def linha(valores) -> str:
+        buffer.seek(0)
+        buffer.truncate()
+        escritor.writerow(valores)
+        return buffer.getvalue()
+
+    yield linha(COLUNAS_CSV)
+    for q in questoes:
+        alt = q.get('alternativas', {})
+        yield linha([q.get('id'), q.get('codigo_bncc'), q.get('ano'), q.get('eixo'), q.get('criada_em'),
+                     q.get('enunciado'), alt.get('A'), alt.get('B'), alt.get('C'), alt.get('D'),
+                     q.get('gabarito'), q.get('gabarito_texto'), q.get('resolucao'),
+                     int(bool(q.get('variante')))])
+
+
+def _texto_gift(texto: str) -> str:
+    """Escapa os caracteres especiais do GIFT e mantém as quebras de linha como \\n."""
+    texto = _RE_ESPECIAIS_GIFT.sub(r'\\\1', str(texto))
+    return texto.replace("\r\n", "\n").replace("\n", "\\n")
+
+
+def _gift(questoes: Iterable[Dict]) -> Iterator[str]:
+    """Questões de múltipla escolha GIFT, com categoria por código BNCC."""
+    categoria = None
+    for q in questoes:
+        codigo = q.get('codigo_bncc', '')
+        if codigo != categoria:
+            categoria = codigo
+            yield f"$CATEGORY: $course$/mate/{codigo}\n\n"
+
+        alt = q.get('alternativas', {})
+        respostas = "\n".join(
+            f"{'=' if l == q.get('gabarito') else '~'}{_texto_gift(alt.get(l, ''))}"
+            for l in ['A', 'B', 'C', 'D'])
+        yield (f"// {codigo} - {q.get('ano', '')} - {q.get('id', '')}\n"
+               f"::{codigo} {q.get('id', '')[:8]}::{_texto_gift(q.get('enunciado', ''))} {{\n"
+               f"{respostas}\n"
+               f"####{_texto_gift(q.get('resolucao', ''))}\n"
+               f"}}\n\n")
+
+
+def exportar(questoes: Iterable[Dict], formato: str) -> Iterator[str]:
+    """
+    Converte questões em texto no formato pedido, uma questão por vez.
+
+    Args:
+        questoes: Registros do banco (ex.: `BancoQuestoes.iterar()`)
+        formato: "jsonl", "csv" ou "gift"
+
+    Returns:
+        Gerador de trechos de texto
+
+    Raises:
+        ValueError: Se o formato não for suportado
+    """
+    geradores = {"jsonl": _jsonl, "csv": _csv, "gift": _gift}
+    if formato not in geradores:
+        raise ValueError(f"Formato '{formato}' não suportado. Use: {', '.join(geradores)}")
+    return geradores[formato](questoes)
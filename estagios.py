@@ -0,0 +1,142 @@
+"""
+Estágios com fila e pool de workers próprios para cada agente.
+
+Cada etapa (contextualizador, calculador, ...) tem uma fila limitada e um
+número fixo de workers compartilhados por todas as requisições. Assim as
+requisições concorrentes formam um pipeline pelos agentes, a capacidade de
+cada etapa é dimensionada separadamente e a etapa mais lenta aparece nas
+métricas (profundidade da fila e tempo de espera).
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FuturoTimeout
+from typing import Any, Callable, Dict, Optional
+
+from prazos import Prazo, PrazoExcedido
+
+
+class Estagio:
+    """
+    Fila limitada atendida por um pool fixo de threads.
+
+    Fila cheia bloqueia quem submete (contrapressão) até o prazo do trabalho.
+    Trabalhos cujo prazo acabou enquanto esperavam na fila são descartados
+    sem ocupar o modelo.
+    """
+
+    def __init__(self, nome: str, workers: int, capacidade: int, amostras: int = 200):
+        """
+        Inicializa o estágio e inicia seus workers.
+
+        Args:
+            nome: Nome da etapa (usado em PrazoExcedido e nas métricas)
+            workers: Número de threads que atendem a fila
+            capacidade: Tamanho máximo da fila
+            amostras: Quantos tempos recentes entram nas médias
+        """
+        self.nome = nome
+        self.workers = max(1, workers)
+        self.fila: queue.Queue = queue.Queue(maxsize=max(1, capacidade))
+        self._lock = threading.Lock()
+        self._ocupados = 0
+        self._processados = 0
+        self._descartados = 0
+        self._esperas = deque(maxlen=amostras)
+        self._execucoes = deque(maxlen=amostras)
+
+        for i in range(self.workers):
+            threading.Thread(target=self._trabalhar, name=f"{nome}-{i}", daemon=True).start()
+
+    def _trabalhar(self):
+        """Laço de um worker: retira trabalhos da fila e os executa."""
+        while True:
+            futuro, funcao, args, prazo, entrada = self.fila.get()
+            espera = time.monotonic() - entrada
+            try:
+                if not futuro.set_running_or_notify_cancel():
+                    continue
+                if prazo is not None and prazo.expirado():
+                    with self._lock:
+                        self._descartados += 1
+                    futuro.set_exception(PrazoExcedido(self.nome))
+                    continue
+
+                with self._lock:
+                    self._ocupados += 1
+                    self._esperas.append(espera)
+                inicio = time.monotonic()
+                try:
+                    futuro.set_result(funcao(*args, prazo))
+                except BaseException as e:
+                    futuro.set_exception(e)
+                finally:
+                    with self._lock:
+                        self._ocupados -= 1
+                        self._processados += 1
+                        self._execucoes.append(time.monotonic() - inicio)
+            finally:
+                self.fila.task_done()
+
+    def submeter(self, funcao: Callable, *args, prazo: Optional[Prazo] = None) -> Future:
+        """
+        Enfileira funcao(*args, prazo) para um worker do estágio.
+
+        Args:
+            funcao: Trabalho a executar; recebe o prazo como último argumento
+            *args: Argumentos do trabalho
+            prazo: Prazo do trabalho, contando também a espera na fila (opcional)
+
+        Returns:
+            Future com o resultado
+
+        Raises:
+            PrazoExcedido: Se a fila continuar cheia até o fim do prazo
+        """
+        futuro: Future = Future()
+        item = (futuro, funcao, args, prazo, time.monotonic())
+        try:
+            self.fila.put(item, timeout=prazo.restante() if prazo else None)
+        except queue.Full:
+            raise PrazoExcedido(self.nome)
+        return futuro
+
+    def executar(self, funcao: Callable, *args, prazo: Optional[Prazo] = None) -> Any:
+        """
+        Submete um trabalho e aguarda o resultado.
+
+        Raises:
+            PrazoExcedido: Se o prazo terminar na fila ou durante a execução
+            Exception: Qualquer exceção levantada pelo trabalho
+        """
+        futuro = self.submeter(funcao, *args, prazo=prazo)
+        try:
+            return futuro.result(timeout=prazo.restante() if prazo else None)
+        except FuturoTimeout:
+            # Ainda na fila: cancela; em execução: o próprio prazo o encerra
+            futuro.cancel()
+            raise PrazoExcedido(self.nome)
+
+    def metricas(self) -> Dict[str, Any]:
+        """
+        Retorna o estado atual do estágio.
+
+        Returns:
+            Dict com workers, ocupados, fila, capacidade, processados,
+            descartados e médias recentes de espera e execução (s)
+        """
+        with self._lock:
+            esperas, execucoes = list(self._esperas), list(self._execucoes)
+            return {
+                "workers": self.workers,
+                "ocupados": self._ocupados,
+                "fila": self.fila.qsize(),
+                "capacidade": self.fila.maxsize,
+                "processados": self._processados,
+                "descartados": self._descartados,
+                "espera_media_s": round(sum(esperas) / len(esperas), 3) if esperas else 0.0,
+                "espera_max_s": round(max(esperas), 3) if esperas else 0.0,
+                "execucao_media_s": round(sum(execucoes) / len(execucoes), 3) if execucoes else 0.0,
+            }
@@ -0,0 +1,195 @@
+"""
+Índice vetorial local de questões aprovadas, usado como contexto few-shot.
+
+Os textos viram vetores por hashing de palavras e bigramas (números viram
+um único token, para que a estrutura do problema pese mais que os valores)
+e a busca é o produto interno com NumPy, separado por código BNCC. Não
+depende de serviço externo nem de modelo de embeddings.
+"""
+
+import json
+import os
+import re
+import threading
+import unicodedata
+import zlib
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+DIMENSAO = 1024
+
+_RE_PALAVRA = re.compile(r'\d+(?:[.,]\d+)*|[a-z]+')
+
+
+def _tokens(texto: str) -> List[str]:
+    """Palavras minúsculas sem acento; números viram '<n>'."""
+    t = unicodedata.normalize('NFKD', texto.lower())
+    t = ''.join(c for c in t if not unicodedata.combining(c))
+    return ['<n>' if p[0].isdigit() else p for p in _RE_PALAVRA.findall(t)]
+
+
+def vetorizar(texto: str, dimensao: int = DIMENSAO) -> np.ndarray:
+    """
+    Converte um texto em vetor unitário (hashing de palavras e bigramas).
+
+    Args:
+        texto: Texto a vetorizar
+        dimensao: Tamanho do vetor
+
+    Returns:
+        np.ndarray float32 de norma 1 (ou zeros, se o texto não tiver palavras)
+    """
+    palavras = _tokens(texto)
+    termos = palavras + [f"{a} {b}" for a, b in zip(palavras, palavras[1:])]
+    v = np.zeros(dimensao, dtype=np.float32)
+    for termo in termos:
+        h = zlib.crc32(termo.encode('utf-8'))
+        v[h % dimensao] += 1.0 if (h >> 31) & 1 else -1.0
+    v = np.sign(v) * np.log1p(np.abs(v))
+    norma = np.linalg.norm(v)
+    return v / norma if norma else v
+
+
+def bloco_exemplos(itens: List[str], limite_caracteres: int) -> str:
+    """
+    Numera os exemplos até o limite de caracteres, para conter o prompt.
+
+    Args:
+        itens: Exemplos já formatados, do mais ao menos relevante
+        limite_caracteres: Tamanho máximo do bloco
+
+    Returns:
+        Texto dos exemplos que couberem ("" se nenhum couber)
+    """
+    partes, total = [], 0
+    for i, item in enumerate(itens, 1):
+        parte = f"Exemplo {i}:\n{item.strip()}"
+        if total + len(parte) > limite_caracteres:
+            break
+        partes.append(parte)
+        total += len(parte) + 2
+    return "\n\n".join(partes)
+
+
+class IndiceExemplares:
+    """
+    Questões aprovadas pelo LLM, indexadas por código BNCC.
+
+    Quase-duplicatas (mesmo texto com outros números) não são reindexadas, e
+    cada código guarda no máximo `maximo_por_codigo` exemplares (os mais
+    antigos saem primeiro). Com `caminho`, o índice é salvo em JSON e
+    recarregado na inicialização.
+    """
+
+    def __init__(self, caminho: Optional[str] = None, maximo_por_codigo: int = 200,
+                 similaridade_duplicata: float = 0.95):
+        """
+        Inicializa o índice.
+
+        Args:
+            caminho: Arquivo JSON para persistência (opcional)
+            maximo_por_codigo: Limite de exemplares por código BNCC
+            similaridade_duplicata: Similaridade a partir da qual um novo
+                enunciado é considerado repetido
+        """
+        self.caminho = caminho
+        self.maximo_por_codigo = maximo_por_codigo
+        self.similaridade_duplicata = similaridade_duplicata
+        self._itens: Dict[str, List[Dict]] = {}
+        self._matrizes: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+        self._sorteio = np.random.default_rng()
+
+        if caminho and os.path.exists(caminho):
+            with open(caminho, 'r', encoding='utf-8') as f:
+                for item in json.load(f):
+                    self._inserir(item)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(itens) for itens in self._itens.values())
+
+    def quantidade(self, codigo: str) -> int:
+        """Número de exemplares indexados para o código."""
+        with self._lock:
+            return len(self._itens.get(codigo, []))
+
+    def _inserir(self, item: Dict) -> bool:
+        """Insere sem travar nem salvar; retorna False para quase-duplicatas."""
+        codigo = item['codigo']
+        v = vetorizar(item['enunciado'])
+        matriz = self._matrizes.get(codigo)
+        if matriz is not None and len(matriz) and float(np.max(matriz @ v)) >= self.similaridade_duplicata:
+            return False
+
+        itens = self._itens.setdefault(codigo, [])
+        itens.append(item)
+        matriz = v[None, :] if matriz is None else np.vstack([matriz, v])
+        if len(itens) > self.maximo_por_codigo:
+            del itens[0]
+            matriz = matriz[1:]
+        self._matrizes[codigo] = matriz
+        return True
+
+    def _salvar(self):
+        """Grava o índice de forma atômica (arquivo temporário + rename)."""
+        dados = [item for itens in self._itens.values() for item in itens]
+        temporario = self.caminho + ".tmp"
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(dados, f, ensure_ascii=False, indent=1)
+        os.replace(temporario, self.caminho)
+
+    def adicionar(self, codigo: str, questao: Dict) -> bool:
+        """
+        Indexa uma questão aprovada.
+
+        Args:
+            codigo: Código BNCC
+            questao: Dict com 'enunciado', 'resolucao' e 'gabarito_texto'
+
+        Returns:
+            True se indexada, False se for quase-duplicata de outra
+        """
+        item = {
+            "codigo": codigo,
+            "enunciado": questao['enunciado'],
+            "resolucao": questao['resolucao'],
+            "gabarito_texto": questao['gabarito_texto'],
+        }
+        with self._lock:
+            novo = self._inserir(item)
+            if novo and self.caminho:
+                self._salvar()
+        return novo
+
+    def buscar(self, codigo: str, consulta: str, k: int = 2, candidatos: int = 0) -> List[Dict]:
+        """
+        Retorna os k exemplares do código mais parecidos com a consulta.
+
+        Com `candidatos` maior que k, sorteia os k entre os `candidatos` mais
+        parecidos: uma consulta fixa (ex.: a descrição da habilidade) passa a
+        variar o contexto entre requisições.
+
+        Args:
+            codigo: Código BNCC
+            consulta: Texto de busca (descrição da habilidade ou enunciado)
+            k: Quantidade máxima de exemplares
+            candidatos: Tamanho do grupo de onde os k são sorteados (opcional)
+
+        Returns:
+            Lista de exemplares, do mais ao menos similar
+        """
+        if k <= 0:
+            return []
+        with self._lock:
+            matriz = self._matrizes.get(codigo)
+            if matriz is None or not len(matriz):
+                return []
+            similaridades = matriz @ vetorizar(consulta)
+            ordem = np.argsort(-similaridades)[:max(k, candidatos)]
+            if len(ordem) > k:
+                # Posições sorteadas em ordem crescente mantêm o mais similar primeiro
+                ordem = ordem[np.sort(self._sorteio.choice(len(ordem), size=k, replace=False))]
+            return [dict(self._itens[codigo][i]) for i in ordem]
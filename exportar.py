@@ -0,0 +1,50 @@
+"""
+Exporta o banco de questões aprovadas em JSONL, CSV ou Moodle GIFT.
+
+Uso:
+    python exportar.py --formato gift --codigo EF06MA09,EF07MA02 --saida questoes.gift.txt
+    python exportar.py --formato csv --ano 6 --desde 2024-01-01 > questoes.csv
+"""
+
+import argparse
+import sys
+
+from banco import ARQUIVO_PADRAO, FORMATOS, BancoQuestoes, exportar, filtros
+
+
+def main(argv=None) -> int:
+    """
+    Lê os argumentos e grava a exportação à medida que o banco é lido.
+
+    Returns:
+        Código de saída (0 em caso de sucesso)
+    """
+    parser = argparse.ArgumentParser(description="Exporta questões aprovadas do banco.")
+    parser.add_argument("--formato", choices=list(FORMATOS), default="jsonl")
+    parser.add_argument("--banco", default=ARQUIVO_PADRAO, help="Arquivo JSONL do banco")
+    parser.add_argument("--codigo", help="Códigos BNCC separados por vírgula")
+    parser.add_argument("--ano", help="Ano escolar (ex.: 6)")
+    parser.add_argument("--desde", help="Data inicial AAAA-MM-DD")
+    parser.add_argument("--ate", help="Data final AAAA-MM-DD")
+    parser.add_argument("--saida", help="Arquivo de saída (padrão: saída padrão)")
+    args = parser.parse_args(argv)
+
+    try:
+        filtro = filtros(args.codigo, args.ano, args.desde, args.ate)
+    except ValueError as e:
+        parser.error(str(e))
+
+    questoes = BancoQuestoes(args.banco).iterar(**filtro)
+    # newline='' evita linhas em branco extras no CSV no Windows
+    saida = open(args.saida, 'w', encoding='utf-8', newline='') if args.saida else sys.stdout
+    try:
+        for trecho in exportar(questoes, args.formato):
+            saida.write(trecho)
+    finally:
+        if saida is not sys.stdout:
+            saida.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
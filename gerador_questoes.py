@@ -3,30 +3,114 @@ Sistema Gerador de Questões - Orquestra os agentes para gerar questões BNCC.
 """
 
 import json
-from typing import Dict, Optional
+import threading
+from collections import Counter
+from typing import Dict, List, Optional
 from langchain_community.llms import Ollama
 
 from agentes.agente_contextualizador import AgenteContextualizador
 from agentes.agente_calculador import AgenteCalculador
 from agentes.agente_alternativas import AgenteAlternativas
 from agentes.agente_revisor import AgenteRevisor
+from agendador import Tarefa, executar_grafo
+from banco import BancoQuestoes, ARQUIVO_PADRAO
+from estagios import Estagio
+from exemplares import IndiceExemplares
+from lotes import LLMEmLotes
+from prazos import Prazo, PrazoExcedido
+from variantes import gerar_variantes
 
 
 # Configuração dos modelos
 OLLAMA_MODEL = "llama3.1:8b"
 
-LLM_TEXT = Ollama(
+# Timeout de leitura (s) do HTTP com o Ollama: libera conexões travadas
+LLM_TIMEOUT_S = 60
+
+# Micro-lotes: prompts que chegam na janela são enviados juntos, até
+# LOTE_MAX por lote e LOTE_CAPACIDADE em andamento por configuração de LLM
+# (a soma das capacidades deve acompanhar OLLAMA_NUM_PARALLEL)
+LOTE_JANELA_S = 0.02
+LOTE_MAX = 4
+LOTE_CAPACIDADE = 4
+
+LLM_TEXT = LLMEmLotes(Ollama(
     model=OLLAMA_MODEL,
     temperature=0.7,
-    num_predict=3000
-)
+    num_predict=3000,
+    timeout=LLM_TIMEOUT_S
+), janela_s=LOTE_JANELA_S, max_lote=LOTE_MAX, capacidade=LOTE_CAPACIDADE)
 
-LLM_JSON = Ollama(
+LLM_JSON = LLMEmLotes(Ollama(
     model=OLLAMA_MODEL,
     temperature=0.1,
     format="json",
-    num_predict=2000
-)
+    num_predict=2000,
+    timeout=LLM_TIMEOUT_S
+), janela_s=LOTE_JANELA_S, max_lote=LOTE_MAX, capacidade=LOTE_CAPACIDADE)
+
+# Se True, o AgenteAlternativas consulta o LLM quando as regras de erros
+# típicos não geram 3 distratores (custa uma chamada extra ao modelo)
+ALTERNATIVAS_USAR_LLM = False
+
+# Variantes numéricas geradas a partir de cada questão aprovada pelo LLM
+VARIANTES_POR_QUESTAO = 5
+
+# Prazo total (s) de uma requisição, dividido entre tentativas e etapas
+PRAZO_REQUISICAO_S = 180
+
+# Se True, o revisor resolve o enunciado em paralelo com o calculador e a
+# revisão compara as respostas, sem uma chamada ao LLM após as alternativas
+REVISAO_INDEPENDENTE = True
+
+# Peso relativo de cada etapa na divisão do prazo de uma tentativa; etapas
+# paralelas (calculador e resolucao_independente) dividem o mesmo trecho
+PESOS_ETAPAS = {
+    "contextualizador": 0.25,
+    "calculador": 0.45,
+    "resolucao_independente": 0.45,
+    "alternativas": 0.15,
+    "revisor": 0.15,
+}
+
+# Workers de cada etapa, compartilhados entre requisições concorrentes.
+# As etapas com LLM devem somar algo próximo de OLLAMA_NUM_PARALLEL
+WORKERS_POR_ETAPA = {
+    "contextualizador": 2,
+    "calculador": 2,
+    "resolucao_independente": 2,
+    "alternativas": 4,
+    "revisor": 2,
+}
+
+# Tamanho máximo da fila de cada etapa; fila cheia segura quem submete
+CAPACIDADE_FILA = 32
+
+# Questões aprovadas usadas como exemplos (few-shot) no contextualizador e
+# no calculador: quantas por prompt e onde o índice é salvo (None: só memória)
+EXEMPLARES_K = 2
+# O contextualizador sorteia seus exemplares entre os N mais parecidos com a
+# habilidade, para que requisições seguidas não recebam sempre o mesmo contexto
+EXEMPLARES_CANDIDATOS = 6
+EXEMPLARES_ARQUIVO = "exemplares.json"
+
+# Arquivo JSONL com todas as questões aprovadas (exportável em /api/exportar)
+BANCO_ARQUIVO = ARQUIVO_PADRAO
+
+
+def _aprovada_por_modelo(validacao: Dict) -> bool:
+    """
+    Indica se a aprovação veio do LLM (revisão ou resolução independente).
+    
+    Aprovações só pela verificação aritmética não confirmam que os passos
+    respondem à pergunta, então não servem de exemplar nem de base para
+    variantes.
+    """
+    try:
+        detalhes = json.loads(validacao["detalhes"])
+    except (KeyError, TypeError, ValueError):
+        return False
+    return isinstance(detalhes, dict) and detalhes.get("verificacao") != "deterministica"
 
 
 class BNCCDatabase:
@@ -80,21 +164,302 @@ class SistemaGeradorQuestoes:
         
         self.contextualizador = AgenteContextualizador(LLM_TEXT)
         self.calculador = AgenteCalculador(LLM_JSON)
-        self.agente_alternativas = AgenteAlternativas(LLM_JSON)
+        self.agente_alternativas = AgenteAlternativas(LLM_JSON, usar_llm=ALTERNATIVAS_USAR_LLM)
         self.revisor = AgenteRevisor(LLM_JSON)
         
         self.historico = []
+        
+        # Banco permanente das questões aprovadas, para exportação
+        self.banco = BancoQuestoes(BANCO_ARQUIVO)
+        
+        # Índice das questões aprovadas, consultado como contexto dos prompts
+        self.exemplares = IndiceExemplares(EXEMPLARES_ARQUIVO)
+        
+        # Aprovação por requisição, com e sem exemplares disponíveis
+        self._desempenho = {"sem_exemplares": Counter(), "com_exemplares": Counter()}
+        self._questoes_servidas = 0
+        self._variantes_servidas = 0
+        self._lock_desempenho = threading.Lock()
+        
+        # Uma fila e um pool de workers por etapa
+        self.estagios = {etapa: Estagio(etapa, workers, CAPACIDADE_FILA)
+                         for etapa, workers in WORKERS_POR_ETAPA.items()}
+        
+        # Variantes prontas por código BNCC, servidas antes de chamar o LLM
+        self.variantes: Dict[str, List[Dict]] = {}
+        self._lock_variantes = threading.Lock()
+    
+    def _multiplicar(self, questao_completa: Dict, habilidade: Dict):
+        """
+        Gera e guarda variantes numéricas de uma questão aprovada.
+        
+        Cada variante tem alternativas refeitas e passa pela revisão
+        determinística antes de entrar no estoque.
+        
+        Args:
+            questao_completa: Questão aprovada (enunciado, resolucao, gabarito_texto)
+            habilidade: Dict com informações BNCC
+        """
+        if VARIANTES_POR_QUESTAO <= 0:
+            return
+        
+        aprovadas = []
+        for variante in gerar_variantes(questao_completa['enunciado'],
+                                        questao_completa['resolucao'],
+                                        questao_completa['gabarito_texto'],
+                                        quantidade=VARIANTES_POR_QUESTAO):
+            try:
+                alternativas = self.agente_alternativas.criar_alternativas(
+                    enunciado=variante['enunciado'],
+                    resposta_correta=variante['gabarito_texto'],
+                    habilidade=habilidade
+                )
+            except Exception as e:
+                print(f"  ⚠️  Variante descartada: {e}")
+                continue
+            
+            questao = dict(variante, alternativas=alternativas)
+            validacao = self.revisor.revisar_deterministico(questao)
+            if validacao["status"] == "APROVADA":
+                self.banco.salvar(habilidade, questao, variante=True)
+                aprovadas.append({
+                    "status": "sucesso",
+                    "codigo_bncc": habilidade['codigo'],
+                    "habilidade": habilidade,
+                    "enunciado": questao['enunciado'],
+                    "alternativas": alternativas,
+                    "resolucao": questao['resolucao'],
+                    "tentativas": 0,
+                    "variante": True,
+                    "validacao": validacao["detalhes"]
+                })
+        
+        if aprovadas:
+            with self._lock_variantes:
+                self.variantes.setdefault(habilidade['codigo'], []).extend(aprovadas)
+            print(f"  ♻️  {len(aprovadas)} variante(s) numérica(s) em estoque para {habilidade['codigo']}")
+    
+    def guardar_pronta(self, resultado: Dict):
+        """
+        Devolve ao estoque uma questão aprovada que não chegou a ser entregue.
+        
+        Usado para gerações antecipadas que o usuário não reclamou.
+        
+        Args:
+            resultado: Resultado de sucesso de `processar_requisicao`
+        """
+        with self._lock_variantes:
+            self.variantes.setdefault(resultado['habilidade']['codigo'], []).append(resultado)
+    
+    def _proxima_variante(self, codigo: str) -> Optional[Dict]:
+        """
+        Retira uma variante do estoque da habilidade, se houver.
+        
+        Args:
+            codigo: Código BNCC
+            
+        Returns:
+            Questão pronta ou None
+        """
+        with self._lock_variantes:
+            estoque = self.variantes.get(codigo)
+            if estoque:
+                return estoque.pop(0)
+        return None
+    
+    def registrar_entrega(self, resultado: Dict):
+        """
+        Contabiliza uma questão entregue ao usuário (histórico e desempenho).
+        
+        Gerações antecipadas só contam aqui, quando reclamadas ou servidas
+        do estoque, e não ao serem geradas.
+        
+        Args:
+            resultado: Resultado de `processar_requisicao`; falhas são ignoradas
+        """
+        if resultado.get('status') != 'sucesso':
+            return
+        with self._lock_desempenho:
+            self._questoes_servidas += 1
+            self._variantes_servidas += bool(resultado.get('variante'))
+        self.historico.append(resultado)
+    
+    def _registrar(self, grupo: str, tentativas: int, aprovada: bool):
+        """
+        Contabiliza o resultado de uma requisição gerada pelo LLM.
+        
+        Args:
+            grupo: "com_exemplares" ou "sem_exemplares"
+            tentativas: Tentativas usadas
+            aprovada: Se a requisição terminou com questão aprovada
+        """
+        with self._lock_desempenho:
+            c = self._desempenho[grupo]
+            c["requisicoes"] += 1
+            c["tentativas"] += tentativas
+            c["aprovadas"] += aprovada
+            c["aprovadas_primeira_tentativa"] += aprovada and tentativas == 1
+    
+    def desempenho(self) -> Dict:
+        """
+        Retorna taxas de aprovação e custo em chamadas ao LLM.
+        
+        A aprovação na primeira tentativa é separada entre requisições que
+        tinham exemplares aprovados da habilidade e as que não tinham (linha
+        de base).
+        
+        Returns:
+            Dict com questões servidas, chamadas ao LLM por questão servida e
+            as taxas de cada grupo
+        """
+        with self._lock_desempenho:
+            grupos = {g: dict(c) for g, c in self._desempenho.items()}
+            servidas, variantes = self._questoes_servidas, self._variantes_servidas
+        
+        chamadas = sum(llm.metricas()["prompts"] for llm in (LLM_TEXT, LLM_JSON))
+        for c in grupos.values():
+            r = c.get("requisicoes", 0)
+            c["taxa_primeira_tentativa"] = round(c.get("aprovadas_primeira_tentativa", 0) / r, 3) if r else None
+        return {
+            "questoes_servidas": servidas,
+            "variantes_servidas": variantes,
+            "exemplares_indexados": len(self.exemplares),
+            "chamadas_llm": chamadas,
+            "chamadas_llm_por_questao": round(chamadas / servidas, 2) if servidas else None,
+            **grupos
+        }
+    
+    def metricas_estagios(self) -> Dict[str, Dict]:
+        """
+        Retorna profundidade de fila, ocupação e tempos de cada etapa.
+        
+        Returns:
+            Dict etapa -> métricas (ver Estagio.metricas)
+        """
+        return {etapa: estagio.metricas() for etapa, estagio in self.estagios.items()}
     
-    def processar_requisicao(self, codigo_bncc: str, max_tentativas: int = 3) -> Dict:
+    def _tarefa(self, etapa: str, funcao, dependencias=(), opcional: bool = False) -> Tarefa:
+        """
+        Cria a tarefa de uma etapa, executada no pool de workers da etapa.
+        
+        Args:
+            etapa: Nome da etapa (chave de WORKERS_POR_ETAPA e PESOS_ETAPAS)
+            funcao: Trabalho da etapa, chamado como funcao(entradas, prazo)
+            dependencias: Etapas das quais esta depende
+            opcional: Se True, um prazo esgotado (na fila do estágio ou no
+                trabalho) resulta em None em vez de abortar a tentativa
+            
+        Returns:
+            Tarefa para `executar_grafo`
+        """
+        estagio = self.estagios[etapa]
+        
+        def executar(entradas, prazo):
+            try:
+                return estagio.executar(funcao, entradas, prazo=prazo)
+            except PrazoExcedido as e:
+                if not opcional:
+                    raise
+                print(f"  ⏱️  {e} (etapa opcional, seguindo sem ela)")
+                return None
+        
+        return Tarefa(etapa, executar, tuple(dependencias), PESOS_ETAPAS[etapa])
+    
+    def _tarefas_tentativa(self, habilidade: Dict) -> List[Tarefa]:
+        """
+        Monta o grafo de etapas de uma tentativa.
+        
+        contextualizador -> calculador -> alternativas -> revisor, com a
+        resolucao_independente do revisor em paralelo ao calculador. O
+        revisor é o ponto de junção: começa pelas pré-checagens
+        determinísticas e compara as duas resoluções. Cada etapa roda no
+        pool de workers correspondente.
+        
+        Args:
+            habilidade: Dict com informações BNCC
+            
+        Returns:
+            Lista de tarefas para `executar_grafo`
+        """
+        codigo = habilidade['codigo']
+        
+        def contextualizar(entradas, prazo):
+            exemplares = self.exemplares.buscar(codigo, habilidade['descricao'], EXEMPLARES_K,
+                                                candidatos=EXEMPLARES_CANDIDATOS)
+            enunciado = self.contextualizador.criar_contexto(habilidade, prazo=prazo, exemplares=exemplares)
+            print(f"  ✅ Enunciado criado")
+            return enunciado
+        
+        def calcular(entradas, prazo):
+            enunciado = entradas["contextualizador"]
+            exemplares = self.exemplares.buscar(codigo, enunciado, EXEMPLARES_K)
+            calculo = self.calculador.calcular_resposta(
+                enunciado, habilidade, prazo=prazo, exemplares=exemplares)
+            print(f"  ✅ Resposta calculada: {calculo['resposta_correta']}")
+            return calculo
+        
+        def resolver(entradas, prazo):
+            # Opcional: sem ela, a revisão volta a consultar o LLM
+            return self.revisor.resolver(entradas["contextualizador"], habilidade, prazo=prazo)
+        
+        def criar_alternativas(entradas, prazo):
+            alternativas = self.agente_alternativas.criar_alternativas(
+                enunciado=entradas["contextualizador"],
+                resposta_correta=entradas["calculador"]['resposta_correta'],
+                habilidade=habilidade,
+                prazo=prazo
+            )
+            print(f"  ✅ Alternativas geradas: A={alternativas['A']}, B={alternativas['B']}, "
+                  f"C={alternativas['C']}, D={alternativas['D']}")
+            return alternativas
+        
+        def revisar(entradas, prazo):
+            calculo = entradas["calculador"]
+            questao_completa = {
+                "enunciado": entradas["contextualizador"],
+                "alternativas": entradas["alternativas"],
+                "gabarito_texto": calculo['resposta_correta'],
+                "resolucao": calculo['resolucao']
+            }
+            validacao = self.revisor.revisar(
+                questao_completa, habilidade, prazo=prazo,
+                resolucao_independente=entradas.get("resolucao_independente"))
+            return questao_completa, validacao
+        
+        dependencias_revisor = ("contextualizador", "calculador", "alternativas")
+        tarefas = [
+            self._tarefa("contextualizador", contextualizar),
+            self._tarefa("calculador", calcular, ("contextualizador",)),
+            self._tarefa("alternativas", criar_alternativas, ("contextualizador", "calculador")),
+        ]
+        if REVISAO_INDEPENDENTE:
+            tarefas.append(self._tarefa("resolucao_independente", resolver, ("contextualizador",),
+                                        opcional=True))
+            dependencias_revisor += ("resolucao_independente",)
+        tarefas.append(self._tarefa("revisor", revisar, dependencias_revisor))
+        return tarefas
+    
+    def processar_requisicao(self, codigo_bncc: str, max_tentativas: int = 3,
+                             prazo_s: Optional[float] = None, usar_variantes: bool = True,
+                             antecipada: bool = False) -> Dict:
         """
         Processa requisição de geração de questão.
         
+        Se houver variante numérica em estoque para a habilidade, ela é
+        servida sem chamar o LLM.
+        
         Args:
             codigo_bncc: Código da habilidade BNCC
             max_tentativas: Número máximo de tentativas antes de desistir
+            prazo_s: Prazo total em segundos (padrão: PRAZO_REQUISICAO_S)
+            usar_variantes: Se False, sempre gera uma questão nova com o LLM
+            antecipada: Se True (geração antecipada), a questão ainda não é
+                contada como entregue; quem a usar chama `registrar_entrega`
             
         Returns:
-            Dict com questão gerada ou mensagem de erro
+            Dict com questão gerada ou mensagem de erro. Se alguma etapa
+            estourar seu prazo, inclui 'etapa_prazo_esgotado'; se o prazo
+            total esgotar, inclui também 'prazo_esgotado': True.
         """
         habilidade = self.database.buscar_por_codigo(codigo_bncc)
         
@@ -104,38 +469,29 @@ class SistemaGeradorQuestoes:
                 "codigos_disponiveis": list(self.database.listar_todas().keys())
             }
         
+        if usar_variantes:
+            variante = self._proxima_variante(habilidade['codigo'])
+            if variante:
+                print(f"\n♻️  Servindo questão pronta do estoque")
+                if not antecipada:
+                    self.registrar_entrega(variante)
+                return variante
+        
+        prazo = Prazo(prazo_s if prazo_s is not None else PRAZO_REQUISICAO_S)
+        etapa_esgotada = None
+        grupo = "com_exemplares" if self.exemplares.quantidade(habilidade['codigo']) else "sem_exemplares"
+        tentativa = 0
+        
         for tentativa in range(1, max_tentativas + 1):
             print(f"\n🔄 Tentativa {tentativa}/{max_tentativas}")
             
+            # Divide o tempo restante igualmente entre as tentativas que faltam
+            prazo_tentativa = prazo.fracao(1.0 / (max_tentativas - tentativa + 1))
+            
             try:
-                # Passo 1: Criar enunciado
-                enunciado = self.contextualizador.criar_contexto(habilidade)
-                print(f"  ✅ Enunciado criado")
-                
-                # Passo 2: Calcular resposta
-                calculo = self.calculador.calcular_resposta(enunciado, habilidade)
-                resposta_correta = calculo['resposta_correta']
-                print(f"  ✅ Resposta calculada: {resposta_correta}")
-                
-                # Passo 3: Gerar alternativas
-                alternativas = self.agente_alternativas.criar_alternativas(
-                    enunciado=enunciado,
-                    resposta_correta=resposta_correta,
-                    habilidade=habilidade
-                )
-                print(f"  ✅ Alternativas geradas: A={alternativas['A']}, B={alternativas['B']}, "
-                      f"C={alternativas['C']}, D={alternativas['D']}")
-                
-                # Passo 4: Montar questão completa
-                questao_completa = {
-                    "enunciado": enunciado,
-                    "alternativas": alternativas,
-                    "gabarito_texto": resposta_correta,
-                    "resolucao": calculo['resolucao']
-                }
-                
-                # Passo 5: Revisar
-                validacao = self.revisor.revisar(questao_completa, habilidade)
+                # Etapas em grafo: independentes rodam em paralelo
+                resultados = executar_grafo(self._tarefas_tentativa(habilidade), prazo=prazo_tentativa)
+                questao_completa, validacao = resultados["revisor"]
                 
                 if validacao["status"] == "APROVADA":
                     print(f"  ✅ APROVADA")
@@ -145,20 +501,33 @@ class SistemaGeradorQuestoes:
                         "status": "sucesso",
                         "codigo_bncc": codigo_bncc,
                         "habilidade": habilidade,
-                        "enunciado": enunciado,
-                        "alternativas": alternativas,
-                        "resolucao": calculo['resolucao'],
+                        "enunciado": questao_completa['enunciado'],
+                        "alternativas": questao_completa['alternativas'],
+                        "resolucao": questao_completa['resolucao'],
                         "tentativas": tentativa,
                         "validacao": validacao["detalhes"]
                     }
                     
-                    self.historico.append(resultado)
+                    if not antecipada:
+                        self.registrar_entrega(resultado)
+                    self._registrar(grupo, tentativa, True)
+                    self.banco.salvar(habilidade, questao_completa)
+                    # Exemplares e variantes só de questões confirmadas pelo LLM
+                    if _aprovada_por_modelo(validacao):
+                        self.exemplares.adicionar(habilidade['codigo'], questao_completa)
+                        self._multiplicar(questao_completa, habilidade)
                     return resultado
                 else:
                     print(f"  ❌ REPROVADA")
                     motivo = validacao['detalhes'][:80] if len(validacao['detalhes']) > 80 else validacao['detalhes']
                     print(f"     Motivo: {motivo}...")
             
+            except PrazoExcedido as e:
+                etapa_esgotada = e.etapa
+                print(f"  ⏱️  {e}")
+                if prazo.expirado():
+                    break
+                continue
             except (json.JSONDecodeError, ValueError) as e:
                 print(f"  ❌ Erro de processamento (JSON/Valor): {str(e)}")
                 continue
@@ -166,11 +535,25 @@ class SistemaGeradorQuestoes:
                 print(f"  ❌ Erro inesperado: {str(e)}")
                 continue
         
-        return {
+        self._registrar(grupo, tentativa, False)
+        
+        if prazo.expirado() and etapa_esgotada:
+            return {
+                "status": "falha",
+                "codigo_bncc": codigo_bncc,
+                "mensagem": f"Prazo da requisição esgotado na etapa '{etapa_esgotada}'",
+                "prazo_esgotado": True,
+                "etapa_prazo_esgotado": etapa_esgotada
+            }
+        
+        resultado = {
             "status": "falha",
             "codigo_bncc": codigo_bncc,
             "mensagem": f"Não foi possível gerar questão aprovada em {max_tentativas} tentativas"
         }
+        if etapa_esgotada:
+            resultado["etapa_prazo_esgotado"] = etapa_esgotada
+        return resultado
 
 
 # Instância global do sistema
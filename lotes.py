@@ -0,0 +1,205 @@
+"""
+Agrupamento (micro-batching) das chamadas ao LLM entre requisições.
+
+A API do Ollama recebe um prompt por requisição HTTP, mas o servidor
+processa em lote as requisições simultâneas de um mesmo modelo (até
+OLLAMA_NUM_PARALLEL). `LLMEmLotes` junta os prompts que chegam numa janela
+curta (ou até encher o lote) e os libera juntos, sem passar da capacidade
+paralela do servidor, para que sejam decodificados no mesmo lote em vez de
+chegarem espalhados. Prompts cujo chamador desistiu (prazo esgotado ou
+cancelado) saem da fila sem ocupar vaga no servidor.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from prazos import Prazo, PrazoExcedido
+
+
+class _Bilhete:
+    """Lugar de um prompt na fila de espera por um lote."""
+
+    __slots__ = ('chegada', 'liberado', 'prazo')
+
+    def __init__(self, prazo: Optional[Prazo] = None):
+        self.chegada = time.monotonic()
+        self.liberado = False
+        self.prazo = prazo
+
+    def desistiu(self) -> bool:
+        """Indica se o chamador já não espera a resposta (prazo esgotado ou cancelado)."""
+        return self.prazo is not None and self.prazo.expirado()
+
+
+class LLMEmLotes:
+    """
+    Envolve um LLM (mesmo modelo e parâmetros) e despacha seus prompts em lotes.
+
+    Expõe `invoke` e `stream` como o LLM original; cada chamada espera sua vez
+    num lote e ocupa uma vaga até terminar (ou até o stream ser fechado).
+    `stream` aceita também o prazo do chamador (`aceita_prazo`), usado por
+    `invocar_llm`. Os demais atributos são repassados ao LLM original.
+    """
+
+    aceita_prazo = True
+
+    def __init__(self, llm, janela_s: float = 0.02, max_lote: int = 4,
+                 capacidade: Optional[int] = None, amostras: int = 200):
+        """
+        Inicializa o agrupador e seu despachante.
+
+        Args:
+            llm: LLM (LangChain) a envolver
+            janela_s: Espera máxima, a partir do primeiro prompt, para juntar outros
+            max_lote: Máximo de prompts por lote
+            capacidade: Chamadas simultâneas aceitas pelo servidor (padrão: max_lote)
+            amostras: Quantos lotes recentes entram nas médias
+        """
+        self.llm = llm
+        self.janela_s = max(0.0, janela_s)
+        self.max_lote = max(1, max_lote)
+        self.capacidade = max(1, capacidade or max_lote)
+
+        self._cond = threading.Condition()
+        self._fila: List[_Bilhete] = []
+        self._em_andamento = 0
+        self._lotes = 0
+        self._prompts = 0
+        self._desistencias = 0
+        self._tamanhos = deque(maxlen=amostras)
+        self._esperas = deque(maxlen=amostras)
+
+        threading.Thread(target=self._despachar, name="lotes-llm", daemon=True).start()
+
+    def __getattr__(self, nome: str) -> Any:
+        if nome == 'llm':
+            raise AttributeError(nome)
+        return getattr(self.llm, nome)
+
+    def _descartar_desistentes(self):
+        """Tira da fila os prompts cujo chamador desistiu (chamado com o lock)."""
+        fila = [b for b in self._fila if not b.desistiu()]
+        if len(fila) != len(self._fila):
+            self._desistencias += len(self._fila) - len(fila)
+            self._fila = fila
+            self._cond.notify_all()
+
+    def _acordar(self):
+        """Acorda quem espera na fila (ex.: um prazo foi cancelado)."""
+        with self._cond:
+            self._cond.notify_all()
+
+    def _despachar(self):
+        """Forma lotes: fecha a janela (ou enche o lote) e libera os prompts juntos."""
+        with self._cond:
+            while True:
+                self._descartar_desistentes()
+                if not self._fila:
+                    self._cond.wait()
+                    continue
+
+                fecha = self._fila[0].chegada + self.janela_s
+                while len(self._fila) < self.max_lote:
+                    restante = fecha - time.monotonic()
+                    if restante <= 0:
+                        break
+                    self._cond.wait(timeout=restante)
+
+                while self._em_andamento >= self.capacidade:
+                    self._cond.wait()
+
+                # Quem desistiu durante a janela não ocupa vaga no lote
+                self._descartar_desistentes()
+                if not self._fila:
+                    continue
+                n = min(len(self._fila), self.max_lote, self.capacidade - self._em_andamento)
+                lote, self._fila = self._fila[:n], self._fila[n:]
+                agora = time.monotonic()
+                for bilhete in lote:
+                    bilhete.liberado = True
+                    self._esperas.append(agora - bilhete.chegada)
+                self._em_andamento += n
+                self._lotes += 1
+                self._tamanhos.append(n)
+                self._cond.notify_all()
+
+    @contextmanager
+    def _vaga(self, prazo: Optional[Prazo] = None) -> Iterator[None]:
+        """
+        Espera o prompt entrar num lote e ocupa uma vaga enquanto ele roda.
+
+        Raises:
+            PrazoExcedido: Se o prazo esgotar (ou for cancelado) antes de a
+                chamada começar; a vaga, se obtida, é devolvida
+        """
+        bilhete = _Bilhete(prazo)
+        if prazo is not None:
+            prazo.ao_cancelar(self._acordar)
+        with self._cond:
+            self._fila.append(bilhete)
+            self._cond.notify_all()
+            while not bilhete.liberado:
+                if bilhete.desistiu():
+                    if bilhete in self._fila:
+                        self._fila.remove(bilhete)
+                        self._desistencias += 1
+                    raise PrazoExcedido("lotes")
+                self._cond.wait(timeout=prazo.restante() if prazo else None)
+        try:
+            if bilhete.desistiu():
+                # Liberado quando o chamador já tinha desistido: não chega a chamar o LLM
+                with self._cond:
+                    self._desistencias += 1
+                raise PrazoExcedido("lotes")
+            with self._cond:
+                self._prompts += 1
+            yield
+        finally:
+            with self._cond:
+                self._em_andamento -= 1
+                self._cond.notify_all()
+
+    def invoke(self, prompt: str, *args, **kwargs):
+        """Equivale a `llm.invoke`, despachado num lote."""
+        with self._vaga():
+            return self.llm.invoke(prompt, *args, **kwargs)
+
+    def stream(self, prompt: str, *args, prazo: Optional[Prazo] = None, **kwargs) -> Iterator:
+        """
+        Equivale a `llm.stream`, despachado num lote; a vaga é liberada ao fechar.
+
+        Com `prazo`, o prompt sai da fila (ou devolve a vaga antes de chamar
+        o LLM) assim que o prazo esgota ou é cancelado.
+        """
+        with self._vaga(prazo):
+            yield from self.llm.stream(prompt, *args, **kwargs)
+
+    def metricas(self) -> Dict[str, Any]:
+        """
+        Retorna o estado e o aproveitamento dos lotes.
+
+        Returns:
+            Dict com janela, limites, fila, chamadas em andamento, totais
+            (prompts de fato enviados ao LLM e, à parte, os descartados por
+            desistência do chamador) e médias recentes de tamanho,
+            preenchimento (tamanho / max_lote) e espera na janela (s)
+        """
+        with self._cond:
+            tamanhos, esperas = list(self._tamanhos), list(self._esperas)
+            medio = sum(tamanhos) / len(tamanhos) if tamanhos else 0.0
+            return {
+                "janela_s": self.janela_s,
+                "max_lote": self.max_lote,
+                "capacidade": self.capacidade,
+                "fila": len(self._fila),
+                "em_andamento": self._em_andamento,
+                "lotes": self._lotes,
+                "prompts": self._prompts,
+                "desistencias": self._desistencias,
+                "tamanho_medio": round(medio, 2),
+                "preenchimento_medio": round(medio / self.max_lote, 3),
+                "espera_media_s": round(sum(esperas) / len(esperas), 4) if esperas else 0.0,
+            }
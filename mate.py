@@ -4,15 +4,38 @@ API Flask para o Sistema Gerador de Questões.
 Fornece endpoints REST para listar habilidades, gerar questões e verificar status.
 """
 
-from flask import Flask, render_template, request, jsonify
+import math
+from functools import partial
+
+from flask import Flask, Response, render_template, request, jsonify
 from flask_cors import CORS
 
-from gerador_questoes import sistema
+from antecipacao import Antecipador
+from banco import FORMATOS, exportar, filtros
+from gerador_questoes import sistema, LLM_TEXT, LLM_JSON, PRAZO_REQUISICAO_S
+from prazos import Prazo, PrazoExcedido
+from utils import estatisticas_json
 
 
 app = Flask(__name__, static_folder='.', template_folder='.')
 CORS(app)
 
+# Geração antecipada ao escolher a habilidade na interface
+ANTECIPACAO_WORKERS = 2       # Gerações antecipadas simultâneas
+ANTECIPACAO_TTL_S = 120       # Validade de um resultado não reclamado
+ANTECIPACAO_POR_CLIENTE = 2   # Antecipações guardadas por cliente
+
+antecipador = Antecipador(partial(sistema.processar_requisicao, antecipada=True),
+                          workers=ANTECIPACAO_WORKERS,
+                          ttl_s=ANTECIPACAO_TTL_S,
+                          max_por_cliente=ANTECIPACAO_POR_CLIENTE,
+                          descartar=sistema.guardar_pronta)
+
+
+def _cliente(data: dict) -> str:
+    """Identifica o cliente pelo 'cliente_id' enviado pela interface ou pelo IP."""
+    return str(data.get('cliente_id') or request.remote_addr)
+
 
 @app.route('/')
 def index():
@@ -45,13 +68,20 @@ def gerar_questao():
     """
     Gera uma questão para a habilidade BNCC especificada.
     
+    Se houver geração antecipada para o cliente e o código, usa o seu
+    resultado (aguardando-a se ainda estiver em andamento); se ela não
+    tiver sucesso (ou levantar erro), gera de novo com o tempo que restar
+    do prazo.
+    
     Request JSON:
         {
-            "codigo_bncc": "EF06MA09"
+            "codigo_bncc": "EF06MA09",
+            "prazo_s": 120,           (opcional)
+            "cliente_id": "..."       (opcional)
         }
     
     Returns:
-        JSON com questão gerada ou mensagem de erro
+        JSON com questão gerada, mensagem de erro ou 504 se o prazo esgotar
     """
     try:
         data = request.get_json()
@@ -62,13 +92,49 @@ def gerar_questao():
         
         print(f"\n📋 Gerando questão para: {codigo_bncc}")
         
-        resultado = sistema.processar_requisicao(codigo_bncc)
+        prazo_s = data.get('prazo_s')
+        if prazo_s is not None:
+            try:
+                prazo_s = float(prazo_s)
+            except (TypeError, ValueError):
+                return jsonify({'erro': 'prazo_s deve ser numérico'}), 400
+            if not math.isfinite(prazo_s) or prazo_s <= 0:
+                return jsonify({'erro': 'prazo_s deve ser um número positivo'}), 400
+            # O cliente pode encurtar o prazo, nunca estendê-lo
+            prazo_s = min(prazo_s, PRAZO_REQUISICAO_S)
+        prazo = Prazo(prazo_s if prazo_s is not None else PRAZO_REQUISICAO_S)
+        
+        try:
+            resultado = antecipador.reclamar(_cliente(data), codigo_bncc.upper().strip(),
+                                             timeout=prazo.restante())
+        except PrazoExcedido as e:
+            resultado = {
+                'status': 'falha',
+                'codigo_bncc': codigo_bncc,
+                'mensagem': str(e),
+                'prazo_esgotado': True,
+                'etapa_prazo_esgotado': e.etapa
+            }
+        except Exception as e:
+            print(f"⚠️  Erro na geração antecipada: {e}")
+            resultado = None
+        if resultado is not None and (resultado.get('status') == 'sucesso' or prazo.expirado()):
+            print(f"⚡ Usando geração antecipada")
+            sistema.registrar_entrega(resultado)
+            resultado = dict(resultado, antecipada=True)
+        else:
+            if resultado is not None:
+                print(f"↩️  Geração antecipada sem sucesso: gerando novamente")
+            resultado = sistema.processar_requisicao(codigo_bncc, prazo_s=prazo.restante())
         
-        if resultado['status'] == 'sucesso':
+        if resultado.get('status') == 'sucesso':
             print(f"✅ Questão gerada com sucesso!")
         else:
             print(f"❌ Falha na geração")
         
+        if resultado.get('prazo_esgotado'):
+            return jsonify(resultado), 504
+        
         return jsonify(resultado)
     
     except Exception as e:
@@ -79,6 +145,63 @@ def gerar_questao():
         }), 500
 
 
+@app.route('/api/antecipar', methods=['POST'])
+def antecipar_questao():
+    """
+    Começa a gerar em segundo plano a questão de uma habilidade.
+    
+    Chamado pela interface ao escolher a habilidade; o próximo /api/gerar
+    do mesmo cliente para o mesmo código aproveita o resultado.
+    
+    Request JSON:
+        {
+            "codigo_bncc": "EF06MA09",
+            "cliente_id": "..."       (opcional)
+        }
+    
+    Returns:
+        JSON com status, 202 se aceita ou 429 se o limite de antecipações foi atingido
+    """
+    data = request.get_json(silent=True) or {}
+    codigo_bncc = str(data.get('codigo_bncc') or '').upper().strip()
+    
+    if not sistema.database.buscar_por_codigo(codigo_bncc):
+        return jsonify({'erro': f'Código {codigo_bncc} não encontrado'}), 404
+    
+    if not antecipador.antecipar(_cliente(data), codigo_bncc):
+        return jsonify({'status': 'recusada'}), 429
+    return jsonify({'status': 'antecipando'}), 202
+
+
+@app.route('/api/exportar', methods=['GET'])
+def exportar_banco():
+    """
+    Exporta as questões aprovadas em streaming.
+    
+    Query string:
+        formato: jsonl (padrão), csv ou gift
+        codigo: Códigos BNCC separados por vírgula (opcional)
+        ano: Ano escolar, ex.: 6 (opcional)
+        desde, ate: Datas AAAA-MM-DD (opcional)
+    
+    Returns:
+        Arquivo enviado em partes, ou 400 se os parâmetros forem inválidos
+    """
+    formato = request.args.get('formato', 'jsonl').lower()
+    if formato not in FORMATOS:
+        return jsonify({'erro': f"Formato deve ser um de: {', '.join(FORMATOS)}"}), 400
+    try:
+        filtro = filtros(request.args.get('codigo'), request.args.get('ano'),
+                         request.args.get('desde'), request.args.get('ate'))
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+    
+    mimetype, extensao = FORMATOS[formato]
+    return Response(exportar(sistema.banco.iterar(**filtro), formato),
+                    mimetype=f"{mimetype}; charset=utf-8",
+                    headers={'Content-Disposition': f'attachment; filename="questoes.{extensao}"'})
+
+
 @app.route('/api/status', methods=['GET'])
 def status():
     """
@@ -91,6 +214,11 @@ def status():
         'status': 'online',
         'modelo': 'Ollama Llama 3.1 8B',
         'habilidades_disponiveis': len(sistema.database.listar_todas()),
+        'extracao_json': estatisticas_json(),
+        'estagios': sistema.metricas_estagios(),
+        'desempenho': sistema.desempenho(),
+        'antecipacao': antecipador.metricas(),
+        'lotes_llm': {'texto': LLM_TEXT.metricas(), 'json': LLM_JSON.metricas()},
         'versao': '3.0 - Refatorado'
     })
 
@@ -0,0 +1,184 @@
+"""
+Prazos (deadlines) e cancelamento das chamadas ao LLM.
+
+Uma requisição recebe um prazo total que é dividido entre tentativas e
+etapas. Cada chamada ao LLM é consumida em streaming numa thread auxiliar;
+se o prazo acabar, o chamador é liberado imediatamente e o stream é fechado,
+encerrando a conexão HTTP com o Ollama (que interrompe a geração). Um prazo
+também pode ser cancelado antes da hora (ex.: quando uma etapa paralela
+falha), o que encerra do mesmo modo as chamadas feitas sob ele e sob os
+prazos derivados dele.
+"""
+
+import queue
+import threading
+import time
+from typing import Callable, List, Optional
+
+
+class PrazoExcedido(Exception):
+    """
+    Levantada quando o prazo de uma etapa termina antes de sua conclusão.
+
+    Attributes:
+        etapa: Nome da etapa em que o prazo esgotou (ex: "revisor")
+    """
+
+    def __init__(self, etapa: str):
+        self.etapa = etapa
+        super().__init__(f"Prazo esgotado na etapa '{etapa}'")
+
+
+class Prazo:
+    """
+    Instante limite (relógio monotônico) para concluir um trabalho.
+
+    Prazos derivados (via `fracao` ou `pai`) nunca ultrapassam o prazo de
+    origem e são cancelados junto com ele.
+    """
+
+    def __init__(self, segundos: float, pai: Optional['Prazo'] = None):
+        """
+        Inicializa o prazo.
+
+        Args:
+            segundos: Tempo disponível a partir de agora
+            pai: Prazo que limita este (opcional)
+        """
+        fim = time.monotonic() + max(0.0, segundos)
+        if pai is not None:
+            fim = min(fim, pai.fim)
+        self.fim = fim
+        self._lock = threading.Lock()
+        self._cancelado = False
+        self._ao_cancelar: List[Callable[[], None]] = []
+        if pai is not None:
+            pai.ao_cancelar(self.cancelar)
+
+    def restante(self) -> float:
+        """Retorna os segundos restantes (nunca negativo)."""
+        return max(0.0, self.fim - time.monotonic())
+
+    def expirado(self) -> bool:
+        """Indica se o prazo já terminou."""
+        return time.monotonic() >= self.fim
+
+    def verificar(self, etapa: str):
+        """
+        Levanta PrazoExcedido se o prazo já terminou.
+
+        Args:
+            etapa: Nome da etapa, usado na mensagem de erro
+        """
+        if self.expirado():
+            raise PrazoExcedido(etapa)
+
+    def cancelar(self):
+        """Encerra o prazo agora, junto com os prazos derivados dele."""
+        with self._lock:
+            if self._cancelado:
+                return
+            self._cancelado = True
+            self.fim = min(self.fim, time.monotonic())
+            callbacks, self._ao_cancelar = self._ao_cancelar, []
+        for callback in callbacks:
+            callback()
+
+    def ao_cancelar(self, callback: Callable[[], None]):
+        """
+        Registra uma função chamada quando o prazo for cancelado.
+
+        Args:
+            callback: Função sem argumentos (chamada na hora se o prazo já
+                foi cancelado)
+        """
+        with self._lock:
+            if not self._cancelado:
+                self._ao_cancelar.append(callback)
+                return
+        callback()
+
+    def fracao(self, fracao: float) -> 'Prazo':
+        """
+        Cria um sub-prazo com uma fração do tempo restante.
+
+        Args:
+            fracao: Parcela do tempo restante (entre 0.0 e 1.0)
+
+        Returns:
+            Novo Prazo limitado por este
+        """
+        return Prazo(self.restante() * min(1.0, max(0.0, fracao)), pai=self)
+
+
+def invocar_llm(llm, prompt: str, prazo: Optional[Prazo] = None, etapa: str = "llm") -> str:
+    """
+    Invoca o LLM respeitando um prazo, com cancelamento da geração.
+
+    Sem prazo, equivale a `llm.invoke(prompt)`. Com prazo, a resposta é lida
+    em streaming numa thread daemon; ao esgotar (ou ser cancelado) o prazo o
+    chamador recebe PrazoExcedido na hora e a thread fecha o stream no
+    próximo fragmento (ou no timeout de leitura configurado no LLM),
+    abortando a requisição HTTP. LLMs com `aceita_prazo` (ex.: LLMEmLotes)
+    recebem o prazo em `stream`, para desistir da chamada ainda na fila.
+
+    Args:
+        llm: Modelo LLM (LangChain)
+        prompt: Texto do prompt
+        prazo: Prazo da etapa (opcional)
+        etapa: Nome da etapa, reportado em caso de estouro
+
+    Returns:
+        Texto gerado pelo LLM
+
+    Raises:
+        PrazoExcedido: Se o prazo terminar antes da resposta completa
+    """
+    if prazo is not None:
+        prazo.verificar(etapa)
+
+    if prazo is None:
+        resp = llm.invoke(prompt)
+        return getattr(resp, 'content', str(resp))
+
+    cancelar = threading.Event()
+    saida = queue.Queue()
+
+    def _consumir():
+        fluxo = None
+        try:
+            if getattr(llm, 'aceita_prazo', False):
+                fluxo = llm.stream(prompt, prazo=prazo)
+            else:
+                fluxo = llm.stream(prompt)
+            partes = []
+            for parte in fluxo:
+                if cancelar.is_set():
+                    return
+                partes.append(getattr(parte, 'content', str(parte)))
+            saida.put(("ok", "".join(partes)))
+        except Exception as e:
+            if not cancelar.is_set():
+                saida.put(("erro", e))
+        finally:
+            # Fechar o gerador encerra a resposta HTTP em andamento
+            if fluxo is not None and hasattr(fluxo, 'close'):
+                fluxo.close()
+
+    prazo.ao_cancelar(lambda: saida.put(("cancelado", None)))
+    threading.Thread(target=_consumir, name=f"llm-{etapa}", daemon=True).start()
+
+    try:
+        tipo, valor = saida.get(timeout=prazo.restante())
+    except queue.Empty:
+        tipo = "cancelado"
+    if tipo == "cancelado":
+        cancelar.set()
+        raise PrazoExcedido(etapa)
+
+    if tipo == "erro":
+        if isinstance(valor, PrazoExcedido):
+            # Desistência dentro do LLM (ex.: na fila de LLMEmLotes): reporta a etapa
+            raise PrazoExcedido(etapa) from valor
+        raise valor
+    return valor
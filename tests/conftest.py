@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Permite importar os módulos da raiz do projeto (utils, agentes, ...)
+sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -0,0 +1,60 @@
+"""
+Testes da comparação com a resolução independente (agentes/agente_revisor.py).
+"""
+
+import json
+
+from agentes.agente_revisor import AgenteRevisor
+
+
+class _LLMFixo:
+    """LLM de teste que sempre aprova e registra se foi chamado."""
+
+    def __init__(self):
+        self.chamadas = 0
+
+    def invoke(self, prompt):
+        self.chamadas += 1
+        return json.dumps({"status": "APROVADA", "resposta_revisor": "150 km",
+                           "gabarito_correspondente": "A", "motivo": "ok"})
+
+
+QUESTAO = {
+    "enunciado": "Um carro viaja a 50 km/h durante 3 horas. Qual distância ele percorre?",
+    "resolucao": "A distância é a velocidade vezes o tempo.",
+    "gabarito_texto": "150 km",
+    "alternativas": {"A": "150 km", "B": "53 km", "C": "100 km", "D": "200 km", "gabarito": "A"},
+}
+
+
+def _revisar(resposta):
+    llm = _LLMFixo()
+    revisor = AgenteRevisor(llm)
+    resultado = revisor.revisar(QUESTAO, {"codigo": "EF06MA03"},
+                                resolucao_independente={"resposta_revisor": resposta})
+    return resultado, llm.chamadas
+
+
+def test_mesmo_valor_aprova_sem_llm():
+    resultado, chamadas = _revisar("150 km")
+    assert resultado["status"] == "APROVADA"
+    assert chamadas == 0
+
+
+def test_valor_diferente_reprova():
+    resultado, chamadas = _revisar("160 km")
+    assert resultado["status"] == "REPROVADA"
+    assert chamadas == 0
+
+
+def test_so_unidade_diferente_segue_para_o_llm():
+    for resposta in ("150", "150 quilômetros"):
+        resultado, chamadas = _revisar(resposta)
+        assert resultado["status"] == "APROVADA"
+        assert chamadas == 1
+
+
+def test_resposta_ilegivel_segue_para_o_llm():
+    resultado, chamadas = _revisar("cento e cinquenta")
+    assert resultado["status"] == "APROVADA"
+    assert chamadas == 1
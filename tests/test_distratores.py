@@ -0,0 +1,48 @@
+"""
+Testes do motor de distratores (agentes/distratores.py).
+"""
+
+from fractions import Fraction
+
+from agentes.distratores import extrair_numeros, gerar_distratores
+
+
+def test_extrai_numeros_do_enunciado():
+    numeros = extrair_numeros("Um produto de R$ 1.200 teve 15% de desconto e sobrou dois terços do estoque.")
+    assert [(n.valor, n.tipo) for n in numeros] == [
+        (Fraction(1200), 'inteiro'), (Fraction(15), 'percentual'), (Fraction(2, 3), 'fracao')]
+
+
+def test_fracao_de_quantidade():
+    distratores = gerar_distratores("Ana tinha 24 balas e deu 3/4 delas ao irmão. Quantas balas ela deu?",
+                                    "18 balas", "EF06MA09")
+    assert distratores[:3] == [("6 balas", "dividiu apenas pelo denominador"),
+                               ("72 balas", "multiplicou apenas pelo numerador"),
+                               ("32 balas", "inverteu a fração")]
+
+
+def test_equacao_aceita_negativos():
+    # 31/3 (erro de sinal) não é inteiro e perde para os erros inteiros
+    assert gerar_distratores("Resolva 3x + 5 = 26.", "7", "EF07MA18") == [
+        ("21", "esqueceu de dividir por a"),
+        ("63", "multiplicou por a em vez de dividir"),
+        ("-7", "trocou o sinal do resultado"),
+    ]
+
+
+def test_mantem_separador_de_milhar():
+    enunciado = "Um carro custa R$ 45.000 e teve aumento de 10%. Qual o novo preço?"
+    assert [t for t, _ in gerar_distratores(enunciado, "R$ 49.500", "EF07MA02")] == [
+        "R$ 40.500", "R$ 4.500", "R$ 45.010"]
+    assert [t for t, _ in gerar_distratores(enunciado, "R$ 49.500,00", "EF07MA02")] == [
+        "R$ 40.500,00", "R$ 4.500,00", "R$ 45.010,00"]
+
+
+def test_sem_separador_de_milhar_quando_a_resposta_nao_usa():
+    enunciado = "Um carro custa R$ 45000 e teve aumento de 10%. Qual o novo preço?"
+    assert [t for t, _ in gerar_distratores(enunciado, "R$ 49500", "EF07MA02")] == [
+        "R$ 40500", "R$ 4500", "R$ 45010"]
+
+
+def test_radical_nao_gera_distratores():
+    assert gerar_distratores("Calcule √12.", "2√3", "EF08MA02") == []
@@ -0,0 +1,34 @@
+"""
+Testes da extração tolerante de JSON (utils.extrair_json).
+"""
+
+import pytest
+
+from utils import extrair_json
+
+
+def test_repara_defeitos_comuns():
+    texto = "Aqui está:\n```json\n{'resposta_correta': '12', 'ok': True, // comentário\n}\n```"
+    assert extrair_json(texto) == {"resposta_correta": "12", "ok": True}
+
+
+def test_objeto_truncado_descarta_o_par_incompleto():
+    assert extrair_json('{"status": "APROVADA", "motivo": "O cálculo do passo') == {"status": "APROVADA"}
+    assert extrair_json('{"a": "x, y", "b": ') == {"a": "x, y"}
+
+
+def test_string_truncada_nao_e_fechada():
+    with pytest.raises(ValueError):
+        extrair_json('{"resposta_correta": "12', {"resposta_correta": str})
+    with pytest.raises(ValueError):
+        extrair_json('{"resolucao": "Passo 1", "resposta_correta": "12', {"resposta_correta": str})
+
+
+def test_aspas_curvas_so_fora_das_strings():
+    assert extrair_json('{"a": "O “dobro” dele"} ok') == {"a": "O “dobro” dele"}
+    assert extrair_json('{“a”: “x”} ok') == {"a": "x"}
+
+
+def test_numero_truncado_e_descartado():
+    assert extrair_json('{"a":"x","b": 12') == {"a": "x"}
+    assert extrair_json('{"a": [1, 2') == {"a": [1]}
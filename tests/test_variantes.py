@@ -0,0 +1,46 @@
+"""
+Testes das variantes numéricas (variantes.py).
+"""
+
+from agentes.verificador import verificar_resolucao
+from variantes import gerar_variantes, tokenizar
+
+
+def test_recalcula_gabarito_e_passos():
+    enunciado = "Um carro viaja a 60 km/h durante 3 horas. Qual distância ele percorre?"
+    variantes = gerar_variantes(enunciado, "Passo 1: 60 × 3 = 180 km", "180 km", quantidade=3, seed=1)
+    assert len(variantes) == 3
+    for v in variantes:
+        assert v["enunciado"] != enunciado
+        velocidade, horas = (t.valor for t in tokenizar(v["enunciado"]))
+        assert tokenizar(v["gabarito_texto"])[0].valor == velocidade * horas
+        assert verificar_resolucao(v["enunciado"], v["resolucao"], v["gabarito_texto"])["conclusao"] == "APROVADA"
+
+
+def test_porcentagem_em_dois_passos():
+    variantes = gerar_variantes("Um produto custa R$ 80 e tem 15% de desconto. Qual o preço final?",
+                                "Passo 1: 15% de 80 = 12\nPasso 2: 80 - 12 = 68", "R$ 68",
+                                quantidade=2, seed=2)
+    assert variantes
+    for v in variantes:
+        assert verificar_resolucao(v["enunciado"], v["resolucao"], v["gabarito_texto"])["conclusao"] == "APROVADA"
+
+
+def test_nao_soma_unidades_diferentes():
+    # 150 = 60 × 2 + 30 só fecha somando minutos a km: nenhuma variante é segura
+    assert gerar_variantes("Um carro viaja a 60 km/h durante 2 horas e 30 minutos. Qual distância ele percorre?",
+                           "Passo 1: 2 horas e 30 minutos = 2,5 horas\nPasso 2: 60 × 2,5 = 150 km",
+                           "150 km", seed=1) == []
+
+
+def test_anos_nao_sao_sorteados():
+    variantes = gerar_variantes("Em 2024, Ana tem 3 caixas com 12 lápis cada. Quantos lápis ela tem?",
+                                "Passo 1: 3 × 12 = 36", "36 lápis", quantidade=3, seed=1)
+    assert variantes
+    assert all(v["enunciado"].startswith("Em 2024,") for v in variantes)
+    assert gerar_variantes("Pedro nasceu em 2010. Quantos anos ele completa em 2024?",
+                           "Passo 1: 2024 - 2010 = 14", "14 anos", seed=1) == []
+
+
+def test_estrutura_nao_reconhecida():
+    assert gerar_variantes("Quanto é metade de uma dúzia?", "Passo 1: Resposta: 6", "6", seed=1) == []
@@ -0,0 +1,93 @@
+"""
+Testes do verificador aritmético (agentes/verificador.py).
+"""
+
+import pytest
+
+from agentes.verificador import verificar_resolucao
+
+
+def conclusao(enunciado, resolucao, gabarito):
+    return verificar_resolucao(enunciado, resolucao, gabarito)["conclusao"]
+
+
+@pytest.mark.parametrize("enunciado, resolucao, gabarito", [
+    ("João tem 30 figurinhas e dá 5 ao irmão. Quantas restam?",
+     "Passo 1: 30 - 5 = 25 figurinhas", "25"),
+    ("Calcule 15% de 80.", "Passo 1: 15% de 80 = 12", "12"),
+    ("Um número multiplicado por 3, somado a 5, dá 26. Qual é o número?",
+     "Passo 1: 3x + 5 = 26\nPasso 2: 3x = 21", "7"),
+    ("Dividir 100 balas entre 3 crianças. Quantas cada uma recebe, aproximadamente?",
+     "Passo 1: 100 ÷ 3 ≈ 33", "33"),
+    ("Dividir 10 reais entre 3 pessoas. Quanto cada uma recebe?",
+     "Passo 1: 10 ÷ 3 = 3,33", "R$ 3,33"),
+])
+def test_aprova_calculos_corretos_que_levam_ao_gabarito(enunciado, resolucao, gabarito):
+    assert conclusao(enunciado, resolucao, gabarito) == "APROVADA"
+
+
+@pytest.mark.parametrize("enunciado, resolucao, gabarito", [
+    ("Calcule 15% de 80.", "Passo 1: 15% de 80 = 13", "13"),
+    ("Dividir 100 balas entre 3 crianças.", "Passo 1: 100 ÷ 3 ≈ 34", "34"),
+    ("Dividir 100 balas entre 3 crianças.", "Passo 1: 100 ÷ 3 = 33", "33"),
+])
+def test_reprova_calculo_errado(enunciado, resolucao, gabarito):
+    assert conclusao(enunciado, resolucao, gabarito) == "REPROVADA"
+
+
+def test_gabarito_fora_dos_resultados_e_inconclusivo():
+    resultado = verificar_resolucao(
+        "Uma pizza foi dividida em 8 pedaços e 3 foram comidos. Que fração da pizza sobrou?",
+        "Passo 1: 8 - 3 = 5\nPasso 2: Fração que sobrou: 5/8 da pizza",
+        "5/8")
+    assert resultado["conclusao"] == "INCONCLUSIVA"
+    assert resultado["erros"] == []
+
+
+def test_gabarito_deve_ser_o_resultado_final():
+    assert conclusao("Ana comprou 4 pacotes com 30 figurinhas. Quantas figurinhas ao todo?",
+                     "Passo 1: 4 × 30 = 120\nPasso 2: 120 ÷ 4 = 30", "120 figurinhas") == "INCONCLUSIVA"
+
+
+@pytest.mark.parametrize("resolucao", [
+    "Passo 1: 2,5 horas = 2 horas e 30 minutos",
+    "Passo 1: 2 horas e 30 minutos = 150 minutos",
+])
+def test_quantidade_composta_nao_e_verificavel(resolucao):
+    resultado = verificar_resolucao("Uma viagem durou 2,5 horas.", resolucao, "2 horas e 30 minutos")
+    assert resultado["conclusao"] == "INCONCLUSIVA"
+    assert resultado["erros"] == []
+    assert resultado["nao_verificados"]
+
+
+def test_operacao_ausente_nao_aprova_sem_o_llm():
+    resultado = verificar_resolucao("João tem 30 figurinhas e dá 5 ao irmão. Quantas restam?",
+                                    "Passo 1: 30 + 5 = 35", "35")
+    assert resultado["conclusao"] == "INCONCLUSIVA"
+    assert "subtração" in resultado["motivo"]
+
+
+def test_numero_sem_origem_e_inconclusivo():
+    assert conclusao("Maria tem 12 lápis. Quantos lápis ela tem em 3 estojos iguais?",
+                     "Passo 1: 12 × 4 = 48", "48") == "INCONCLUSIVA"
+
+
+def test_variavel_usa_valor_atribuido():
+    enunciado = "Calcule o valor de 3x + 2 para x = 4."
+    assert conclusao(enunciado, "Passo 1: Substituindo x = 4: 3 · 4 + 2 = 14", "14") == "APROVADA"
+    assert conclusao(enunciado, "Passo 1: 3x + 2 = 3 · 4 + 2 = 14", "14") == "APROVADA"
+
+
+def test_cadeia_com_variavel_que_nao_confere_e_inconclusiva():
+    resultado = verificar_resolucao("Um número multiplicado por 3, somado a 5, dá 26. Qual é o número?",
+                                    "Passo 1: 3x + 5 = 26\nPasso 2: 3x = 21\nPasso 3: x = 7", "8")
+    assert resultado["conclusao"] == "INCONCLUSIVA"
+    assert resultado["erros"] == []
+
+
+def test_horario_nao_e_divisao():
+    resultado = verificar_resolucao("Um filme começou às 14:30 e terminou às 16:30. Quanto tempo durou?",
+                                    "Passo 1: 16:30 - 14:30 = 2 horas", "2 horas")
+    assert resultado["conclusao"] == "INCONCLUSIVA"
+    assert resultado["erros"] == []
+    assert conclusao("Divida 12 por 4.", "Passo 1: 12 : 4 = 3", "3") == "APROVADA"
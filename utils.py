@@ -2,13 +2,273 @@
 Funções utilitárias compartilhadas entre os agentes.
 """
 
+import json
 import re
-from typing import Tuple, Optional
+import threading
+from collections import Counter
+from fractions import Fraction
+from functools import lru_cache
+from typing import Dict, List, Tuple, Optional, Union
+
+
+_RE_ESPACOS = re.compile(r'\s+')
+
+# Literal numérico: milhar com ponto ("1.200,50") ou decimal ("0.125" é decimal)
+MILHAR = r'[1-9]\d{0,2}(?:\.\d{3})+(?:,\d+)?'
+NUMERO = MILHAR + r'(?!\d)|\d+(?:[.,]\d+)?'
+RE_NUMERO_LITERAL = re.compile(r'(?:\d+\s*/\s*\d+|' + NUMERO + r')')
+_RE_VALOR_SIMPLES = re.compile(r'[-+]?' + RE_NUMERO_LITERAL.pattern)
+RE_MILHAR = re.compile(MILHAR)
+_RE_FRACAO = re.compile(r'(\d+)\s*/\s*(\d+)')
+
+# Valor de uma quantidade: sinal, e então raiz, potência, número misto,
+# fração ou número simples (nessa ordem de preferência)
+_SOBRESCRITOS = '⁰¹²³⁴⁵⁶⁷⁸⁹'
+_RE_VALOR = re.compile(
+    r'(?P<sinal>[-+−]\s*)?(?:'
+    r'(?:(?P<coef>' + NUMERO + r')\s*)?(?P<raiz>√|∛|raiz\s+quadrada\s+de|raiz\s+c[úu]bica\s+de)'
+    r'\s*\(?\s*(?P<radicando>' + NUMERO + r')\s*\)?'
+    r'|(?P<base>' + NUMERO + r')(?:\s*\^\s*\(?\s*(?P<exp>-?\d+(?:\s*/\s*\d+)?)\s*\)?'
+    r'|(?P<sobrescrito>[' + _SOBRESCRITOS + r']+)(?![a-zà-ú]))'
+    r'|(?P<inteiro>\d+)\s+(?:e\s+)?(?P<mnum>\d+)\s*/\s*(?P<mden>\d+)'
+    r'|(?P<fnum>\d+)\s*/\s*(?P<fden>\d+)'
+    r'|(?P<numero>' + NUMERO + r'))',
+    flags=re.I
+)
+_RE_MOEDA = re.compile(r'r\$\s*$', flags=re.I)
+_RE_PLURAL_PARENTESES = re.compile(r'\((?:s|es)\)')
+_RE_PONTUACAO_UNIDADE = re.compile(r'^[\s.,;:]+|[\s.,;:]+$')
+
+_SINONIMOS_UNIDADE = {
+    'r$': 'r$', 'real': 'r$', 'reais': 'r$',
+    '%': '%', 'por cento': '%', 'porcento': '%',
+    'm2': 'm²', 'metro quadrado': 'm²', 'metros quadrados': 'm²',
+    'cm2': 'cm²', 'centímetro quadrado': 'cm²', 'centímetros quadrados': 'cm²',
+    'm3': 'm³', 'metro cúbico': 'm³', 'metros cúbicos': 'm³',
+}
+_PLURAIS = (('ões', 'ão'), ('ães', 'ão'), ('ãos', 'ão'), ('ais', 'al'), ('éis', 'el'),
+            ('óis', 'ol'), ('zes', 'z'), ('res', 'r'), ('ns', 'm'), ('s', ''))
 
 
 def normalize_space(s: str) -> str:
     """Normaliza espaços em branco e converte para lowercase."""
-    return re.sub(r'\s+', ' ', s or '').strip().lower()
+    return _RE_ESPACOS.sub(' ', s or '').strip().lower()
+
+
+def numero_para_fracao(texto: str) -> Optional[Fraction]:
+    """
+    Converte um literal numérico em Fraction exata.
+    
+    Exemplos:
+        "12,5" -> Fraction(25, 2)
+        "1.200" -> Fraction(1200)
+        "7/8" -> Fraction(7, 8)
+        "abc" -> None
+    """
+    t = (texto or "").strip().replace(' ', '')
+    m = _RE_FRACAO.fullmatch(t)
+    if m:
+        d = int(m.group(2))
+        return Fraction(int(m.group(1)), d) if d else None
+    if RE_MILHAR.fullmatch(t):
+        t = t.replace('.', '')
+    try:
+        return Fraction(t.replace(',', '.'))
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+def _singular(palavra: str) -> str:
+    """Reduz uma palavra ao singular por regras simples do português."""
+    if len(palavra) <= 3:
+        return palavra
+    for sufixo, troca in _PLURAIS:
+        if palavra.endswith(sufixo):
+            return palavra[:-len(sufixo)] + troca
+    return palavra
+
+
+def normalizar_unidade(unidade: str) -> str:
+    """
+    Normaliza uma unidade para comparação.
+    
+    Exemplos:
+        "Litros." -> "litro"
+        "litro(s)" -> "litro"
+        "reais" -> "r$"
+        "metros quadrados" -> "m²"
+    """
+    u = _RE_PLURAL_PARENTESES.sub('', normalize_space(unidade))
+    u = _RE_PONTUACAO_UNIDADE.sub('', u)
+    if u in _SINONIMOS_UNIDADE:
+        return _SINONIMOS_UNIDADE[u]
+    return ' '.join(_singular(p) for p in u.split(' ')) if u else ''
+
+
+def extrair_raiz(valor: Fraction, indice: int) -> Tuple[Optional[Fraction], int]:
+    """
+    Extrai a raiz de um racional não negativo.
+    
+    Raízes exatas retornam (raiz, 1). Raízes quadradas irracionais de
+    inteiros retornam a forma simplificada (coeficiente, radicando livre de
+    quadrados), ex.: √12 -> (2, 3). Outros casos retornam (None, 1).
+    """
+    if valor < 0:
+        return None, 1
+    partes = []
+    for x in (valor.numerator, valor.denominator):
+        r = round(x ** (1.0 / indice))
+        exata = next((c for c in (r - 1, r, r + 1) if c >= 0 and c ** indice == x), None)
+        partes.append(exata)
+    if None not in partes:
+        return Fraction(partes[0], partes[1]), 1
+    if indice != 2 or valor.denominator != 1:
+        return None, 1
+    n, coef, f = valor.numerator, 1, 2
+    while f * f <= n:
+        while n % (f * f) == 0:
+            n //= f * f
+            coef *= f
+        f += 1
+    return Fraction(coef), n
+
+
+class Quantidade:
+    """
+    Quantidade exata (valor racional, raiz quadrada opcional e unidade).
+    
+    O valor representado é `valor * √radicando` (radicando = 1 para números
+    racionais). Instâncias são imutáveis e comparáveis; use `parse_quantidade`
+    para obtê-las a partir de texto (com cache).
+    
+    Exemplos:
+        parse_quantidade("7/8 litro") == parse_quantidade("0,875 litros") -> True
+        parse_quantidade("R$ 1.200,50") == parse_quantidade("1200,5 reais") -> True
+        parse_quantidade("√12") == parse_quantidade("2√3") -> True
+    """
+    
+    __slots__ = ('valor', 'radicando', 'unidade')
+    
+    def __init__(self, valor: Fraction, unidade: str = "", radicando: int = 1):
+        """
+        Inicializa a quantidade.
+        
+        Args:
+            valor: Valor racional (coeficiente da raiz, se houver)
+            unidade: Unidade já normalizada (ver `normalizar_unidade`)
+            radicando: Radicando livre de quadrados (1 = sem raiz)
+        """
+        if valor == 0:
+            radicando = 1
+        object.__setattr__(self, 'valor', Fraction(valor))
+        object.__setattr__(self, 'radicando', radicando)
+        object.__setattr__(self, 'unidade', unidade)
+    
+    def __setattr__(self, nome, valor):
+        raise AttributeError("Quantidade é imutável")
+    
+    def __delattr__(self, nome):
+        raise AttributeError("Quantidade é imutável")
+    
+    def __eq__(self, outra) -> bool:
+        if not isinstance(outra, Quantidade):
+            return NotImplemented
+        return (self.valor == outra.valor and self.radicando == outra.radicando
+                and self.unidade == outra.unidade)
+    
+    def __hash__(self) -> int:
+        return hash((self.valor, self.radicando, self.unidade))
+    
+    def __float__(self) -> float:
+        return float(self.valor) * self.radicando ** 0.5
+    
+    def __repr__(self) -> str:
+        raiz = f"√{self.radicando}" if self.radicando != 1 else ""
+        unidade = f" {self.unidade}" if self.unidade else ""
+        return f"Quantidade({self.valor}{raiz}{unidade})"
+    
+    @property
+    def exata(self) -> Optional[Fraction]:
+        """Valor como Fraction, ou None se envolver raiz irracional."""
+        return self.valor if self.radicando == 1 else None
+
+
+def _valor_do_match(m: re.Match) -> Tuple[Optional[Fraction], int]:
+    """Calcula (coeficiente, radicando) a partir de um match de _RE_VALOR."""
+    if m.group('raiz'):
+        coef = numero_para_fracao(m.group('coef')) if m.group('coef') else Fraction(1)
+        indice = 3 if m.group('raiz') == '∛' or 'bica' in m.group('raiz').lower() else 2
+        raiz, radicando = extrair_raiz(numero_para_fracao(m.group('radicando')), indice)
+        return (coef * raiz if raiz is not None else None), radicando
+    if m.group('base'):
+        base = numero_para_fracao(m.group('base'))
+        if m.group('sobrescrito'):
+            expoente = Fraction(int(m.group('sobrescrito').translate(
+                str.maketrans(_SOBRESCRITOS, '0123456789'))))
+        else:
+            expoente = numero_para_fracao(m.group('exp').lstrip('-'))
+            if m.group('exp').startswith('-'):
+                expoente = -expoente
+        if expoente is None or abs(expoente) > 20 or (base == 0 and expoente < 0):
+            return None, 1
+        potencia = base ** int(expoente.numerator)
+        if expoente.denominator == 1:
+            return potencia, 1
+        return extrair_raiz(potencia, expoente.denominator)
+    if m.group('inteiro'):
+        d = int(m.group('mden'))
+        if not d:
+            return None, 1
+        return int(m.group('inteiro')) + Fraction(int(m.group('mnum')), d), 1
+    if m.group('fnum'):
+        d = int(m.group('fden'))
+        return (Fraction(int(m.group('fnum')), d) if d else None), 1
+    return numero_para_fracao(m.group('numero')), 1
+
+
+@lru_cache(maxsize=4096)
+def parse_quantidade(texto: str) -> Optional[Quantidade]:
+    """
+    Interpreta um texto como Quantidade (resultado em cache).
+    
+    Reconhece decimais com vírgula ou ponto, separador de milhar, frações,
+    números mistos ("1 1/2", "2 e 3/4"), porcentagens, valores em reais
+    ("R$ 12,50"), potências ("2^3", "5²", "8^(2/3)") e raízes ("√16",
+    "2√3", "raiz quadrada de 12", "∛27"). O texto antes do número é
+    ignorado, exceto o prefixo "R$".
+    
+    Exemplos:
+        "12,5 litros" -> Quantidade(25/2 litro)
+        "abc" -> None
+    
+    Returns:
+        Quantidade ou None se não houver valor exato reconhecível
+    """
+    t = (texto or "").strip()
+    m = _RE_VALOR.search(t)
+    if not m:
+        return None
+    valor, radicando = _valor_do_match(m)
+    if valor is None:
+        return None
+    if m.group('sinal') and m.group('sinal').strip() in ('-', '−'):
+        valor = -valor
+    
+    unidade = normalizar_unidade(t[m.end():])
+    if _RE_MOEDA.search(t[:m.start()]) and unidade in ('', 'r$'):
+        unidade = 'r$'
+    return Quantidade(valor, unidade, radicando)
+
+
+def chave_valor(texto: str) -> Union[Quantidade, str]:
+    """
+    Chave para detectar valores repetidos ("1/2 litro" e "0,5 litros" colidem).
+    
+    Returns:
+        Quantidade se o texto tiver valor reconhecível, senão o texto normalizado
+    """
+    q = parse_quantidade(texto)
+    return q if q is not None else normalize_space(texto)
 
 
 def split_value_unit(texto: str) -> Tuple[str, str]:
@@ -20,39 +280,26 @@ def split_value_unit(texto: str) -> Tuple[str, str]:
         "7/8 metro" -> ("7/8", "metro")
     """
     t = (texto or "").strip()
-    m = re.search(r'([-+]?\d+(?:[.,]\d+)?|\d+\/\d+)', t)
+    m = _RE_VALOR_SIMPLES.search(t)
     if not m:
         return t, ""
-    num = m.group(1)
+    num = m.group(0)
     unidade = (t[m.end():]).strip(" .")
     return num, unidade
 
 
 def to_float(x: str) -> Optional[float]:
     """
-    Converte string (decimal ou fração) para float.
+    Converte string (decimal, fração ou outra forma aceita por
+    `parse_quantidade`) para float.
     
     Exemplos:
         "12,5" -> 12.5
         "7/8" -> 0.875
         "abc" -> None
     """
-    x = (x or "").strip()
-    
-    # Trata fração
-    if re.fullmatch(r'\d+\/\d+', x):
-        n, d = x.split('/')
-        try:
-            return float(n) / float(d)
-        except:
-            return None
-    
-    # Trata decimal
-    x = x.replace(',', '.')
-    try:
-        return float(x)
-    except:
-        return None
+    q = parse_quantidade((x or "").strip())
+    return float(q) if q is not None else None
 
 
 def same_value(a: str, b: str) -> bool:
@@ -60,26 +307,18 @@ def same_value(a: str, b: str) -> bool:
     Verifica se dois valores são equivalentes.
     
     Considera:
-    - Equivalência numérica (0,875 == 0.875 == 7/8)
-    - Unidades ignorando plural (litro == litros)
+    - Equivalência numérica exata (0,875 == 0.875 == 7/8, √12 == 2√3)
+    - Unidades normalizadas (litro == litros, reais == R$)
     - Equivalência textual se não houver número
     
     Exemplos:
         same_value("0,875 litros", "7/8 litro") -> True
         same_value("12 metros", "12 metro") -> True
     """
-    a_val, a_unit = split_value_unit(a)
-    b_val, b_unit = split_value_unit(b)
-    
-    fa, fb = to_float(a_val), to_float(b_val)
-    same_num = (fa is not None and fb is not None and abs(fa - fb) < 1e-9)
-    same_text = normalize_space(a) == normalize_space(b)
-    
-    au = normalize_space(a_unit).rstrip('s')
-    bu = normalize_space(b_unit).rstrip('s')
-    same_unit = (au == bu) or (au == "" and bu == "")
-    
-    return (same_num and same_unit) or same_text
+    qa, qb = parse_quantidade((a or "").strip()), parse_quantidade((b or "").strip())
+    if qa is not None and qb is not None:
+        return qa == qb
+    return normalize_space(a) == normalize_space(b)
 
 
 def perturb_value(valor: str, unidade: str, delta: float) -> str:
@@ -94,27 +333,17 @@ def perturb_value(valor: str, unidade: str, delta: float) -> str:
     Retorna:
         Novo valor perturbado com unidade
     """
-    if re.fullmatch(r'\d+\/\d+', valor):
-        n, d = valor.split('/')
-        try:
-            base = float(n) / float(d)
-            var = base * (1 + delta)
-        except:
-            return f"{valor} {unidade}".strip()
-        texto = f"{var:.3f}".rstrip('0').rstrip('.')
-        texto = texto.replace('.', ',')
-        return f"{texto} {unidade}".strip()
-    
-    try:
-        estilo_virgula = (',' in valor and '.' not in valor)
-        base = float(valor.replace(',', '.'))
-        var = base * (1 + delta)
-        texto = f"{var:.3f}".rstrip('0').rstrip('.')
-        if estilo_virgula:
-            texto = texto.replace('.', ',')
-        return f"{texto} {unidade}".strip()
-    except:
+    sinal = -1 if valor.startswith('-') else 1
+    base = numero_para_fracao(valor.lstrip('+-'))
+    if base is None:
         return f"{valor} {unidade}".strip()
+    var = float(sinal * base) * (1 + delta)
+    texto = f"{var:.3f}".rstrip('0').rstrip('.')
+    
+    # Saída com vírgula, exceto se o original usava ponto decimal
+    if '.' not in valor or RE_MILHAR.fullmatch(valor.lstrip('+-')):
+        texto = texto.replace('.', ',')
+    return f"{texto} {unidade}".strip()
 
 
 def clean_json_markdown(texto: str) -> str:
@@ -127,3 +356,213 @@ def clean_json_markdown(texto: str) -> str:
     if t.endswith("```"):
         t = t[:-3]
     return t.strip()
+
+
+# ---------------------------------------------------------------------------
+# Extração tolerante de JSON
+# ---------------------------------------------------------------------------
+
+_RE_LITERAL_PYTHON = re.compile(r'(True|False|None)\b')
+_LITERAIS_JSON = {'True': 'true', 'False': 'false', 'None': 'null'}
+_RE_NUMERO_FINAL = re.compile(r'-?\d[\d.eE+-]*$')
+
+# Contagem por agente: "direto" (JSON válido), "reparado" (salvo pelo
+# reparo, evitando uma nova tentativa) e "falha"
+_estatisticas_json: Dict[str, Counter] = {}
+_lock_estatisticas = threading.Lock()
+
+
+def _contar_json(origem: str, resultado: str):
+    """Incrementa o contador de extrações de JSON de uma origem."""
+    with _lock_estatisticas:
+        _estatisticas_json.setdefault(origem or "geral", Counter())[resultado] += 1
+
+
+def estatisticas_json() -> Dict[str, Dict[str, int]]:
+    """
+    Retorna os contadores de extração de JSON por agente.
+    
+    Returns:
+        Dict origem -> {"direto": n, "reparado": n, "falha": n}
+    """
+    with _lock_estatisticas:
+        return {origem: {k: c[k] for k in ("direto", "reparado", "falha")}
+                for origem, c in _estatisticas_json.items()}
+
+
+def _normalizar_json(t: str) -> Tuple[str, List[str]]:
+    """
+    Reescreve o primeiro objeto JSON de um texto corrigindo defeitos comuns.
+    
+    Converte aspas simples e curvas (“ ”) que delimitam strings em duplas
+    (dentro de uma string, aspas curvas são preservadas), escapa quebras de
+    linha em strings, remove vírgulas antes de '}' ou ']', comentários "//"
+    e troca literais Python (True/False/None). Para ao fechar o primeiro objeto. Uma string
+    não terminada (saída truncada) é descartada, não fechada: seu conteúdo
+    está incompleto.
+    
+    Returns:
+        (texto normalizado, pilha de fechamentos ainda pendentes)
+    """
+    saida: List[str] = []
+    pilha: List[str] = []
+    aspas = None
+    inicio_string = 0
+    escape = False
+    i = 0
+    while i < len(t):
+        c = t[i]
+        if aspas:
+            if escape:
+                saida.append(c)
+                escape = False
+            elif c == '\\':
+                saida.append(c)
+                escape = True
+            elif c == aspas:
+                saida.append('"')
+                aspas = None
+            elif c == '"':
+                saida.append('\\"')
+            elif c == '\n':
+                saida.append('\\n')
+            else:
+                saida.append(c)
+        elif c in '"\'“”':
+            aspas = '”' if c in '“”' else c
+            inicio_string = len(saida)
+            saida.append('"')
+        elif c in '{[':
+            pilha.append('}' if c == '{' else ']')
+            saida.append(c)
+        elif c in '}]':
+            while saida and saida[-1].isspace():
+                saida.pop()
+            if saida and saida[-1] == ',':
+                saida.pop()
+            if not pilha:
+                break
+            saida.append(pilha.pop())
+            if not pilha:
+                break
+        elif c == '/' and t[i + 1:i + 2] == '/':
+            fim = t.find('\n', i)
+            i = len(t) if fim < 0 else fim
+            continue
+        else:
+            m = _RE_LITERAL_PYTHON.match(t, i)
+            if m and (i == 0 or not t[i - 1].isalnum()):
+                saida.append(_LITERAIS_JSON[m.group(1)])
+                i = m.end()
+                continue
+            saida.append(c)
+        i += 1
+    if aspas:
+        del saida[inicio_string:]
+    return ''.join(saida), pilha
+
+
+def _pendentes(t: str) -> List[str]:
+    """Fechamentos pendentes ('}' / ']') de um JSON já normalizado."""
+    pilha, em_string, escape = [], False, False
+    for c in t:
+        if em_string:
+            if escape:
+                escape = False
+            elif c == '\\':
+                escape = True
+            elif c == '"':
+                em_string = False
+        elif c == '"':
+            em_string = True
+        elif c in '{[':
+            pilha.append('}' if c == '{' else ']')
+        elif c in '}]' and pilha:
+            pilha.pop()
+    return pilha
+
+
+def _fechar_json(t: str, pilha: List[str]) -> Optional[object]:
+    """
+    Completa um JSON truncado (ex.: por num_predict) e tenta decodificá-lo.
+    
+    Fecha os colchetes pendentes; se ainda falhar (ou se o texto acabar
+    numa chave sem valor ou num número, que pode ter sido cortado: "12" de
+    "125"), recua até a última vírgula, descartando o par chave/valor
+    incompleto.
+    """
+    numero_cortado = bool(pilha) and _RE_NUMERO_FINAL.search(t.rstrip()) is not None
+    for _ in range(8):
+        base = t.rstrip().rstrip(',')
+        if not base.endswith(':') and not numero_cortado:
+            try:
+                return json.loads(base + ''.join(reversed(pilha)))
+            except json.JSONDecodeError:
+                pass
+        corte = t.rfind(',')
+        if corte <= 0:
+            return None
+        t = t[:corte]
+        pilha = _pendentes(t)
+        numero_cortado = False
+    return None
+
+
+def _validar_esquema(dados: object, esquema: Optional[Dict]) -> Dict:
+    """
+    Confere se o objeto tem as chaves e tipos exigidos.
+    
+    Raises:
+        ValueError: Se o objeto não for um dict ou violar o esquema
+    """
+    if not isinstance(dados, dict):
+        raise ValueError("JSON de saída não é um objeto.")
+    for chave, tipo in (esquema or {}).items():
+        if chave not in dados:
+            raise ValueError(f"JSON de saída não contém '{chave}'.")
+        if not isinstance(dados[chave], tipo):
+            raise ValueError(f"Campo '{chave}' com tipo inválido: {type(dados[chave]).__name__}.")
+    return dados
+
+
+def extrair_json(texto: str, esquema: Optional[Dict] = None, origem: str = "") -> Dict:
+    """
+    Extrai e valida o primeiro objeto JSON de uma saída do LLM.
+    
+    Tolera cercas markdown, texto antes/depois do objeto, vírgulas sobrando,
+    aspas simples ou curvas, literais Python, comentários e saídas truncadas
+    (o par chave/valor incompleto é descartado, então um campo exigido que
+    foi cortado faz o esquema falhar). Cada extração é contada em
+    `estatisticas_json()` como "direto", "reparado" ou "falha".
+    
+    Args:
+        texto: Saída bruta do LLM
+        esquema: Dict chave -> tipo (ou tupla de tipos) obrigatórios (opcional)
+        origem: Nome do agente, usado nos contadores
+        
+    Returns:
+        Dict decodificado
+        
+    Raises:
+        ValueError: Se não houver objeto recuperável ou o esquema não for atendido
+    """
+    t = clean_json_markdown(texto or "")
+    try:
+        dados = _validar_esquema(json.loads(t), esquema)
+        _contar_json(origem, "direto")
+        return dados
+    except ValueError:
+        pass
+    
+    inicio = t.find('{')
+    dados = None
+    if inicio >= 0:
+        normalizado, pilha = _normalizar_json(t[inicio:])
+        dados = _fechar_json(normalizado, pilha)
+    try:
+        dados = _validar_esquema(dados, esquema)
+    except ValueError:
+        _contar_json(origem, "falha")
+        raise
+    _contar_json(origem, "reparado")
+    return dados
@@ -0,0 +1,551 @@
+"""
+Variantes numéricas - Multiplica uma questão aprovada trocando seus números.
+
+A partir do enunciado, da resolução e do gabarito de uma questão aprovada,
+uma busca exaustiva de profundidade limitada descobre a expressão que liga
+os números do enunciado à resposta e a cada número citado nos passos. Novas
+entradas são sorteadas em faixas válidas e o texto é recalculado de forma
+determinística, sem chamar o LLM. As expressões respeitam as unidades
+físicas que acompanham os números (não somam minutos a horas), e anos não
+são sorteados.
+"""
+
+import math
+import random
+import re
+from fractions import Fraction
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from utils import NUMERO, RE_MILHAR, numero_para_fracao
+
+
+class Token(NamedTuple):
+    """Número citado em um texto, com sua posição."""
+    inicio: int
+    fim: int
+    texto: str
+    valor: Fraction
+    percentual: bool
+
+
+_RE_TOKEN = re.compile(
+    r'(?<![\d/.,])(\d+\s*/\s*\d+|' + NUMERO + r')(?![\d/])(\s*%)?'
+)
+_RE_PASSO = re.compile(r'^(\s*Passo\s*\d+\s*:)(.*)$', flags=re.I)
+_RE_UNIDADE = re.compile(r'\s*([A-Za-zÀ-ÿ]+)([²³])?(?:\s*/\s*([A-Za-zÀ-ÿ]+))?')
+_RE_MOEDA_ANTES = re.compile(r'R\$\s*$')
+_RE_ANO = re.compile(r'(?:19|20)\d\d')
+
+# Unidades físicas reconhecidas após um número; palavras de contagem
+# ("lápis", "caixas") não entram e deixam o número adimensional
+_UNIDADES = {
+    **dict.fromkeys(('h', 'hora', 'horas'), 'h'),
+    **dict.fromkeys(('min', 'minuto', 'minutos'), 'min'),
+    **dict.fromkeys(('s', 'seg', 'segundo', 'segundos'), 's'),
+    **dict.fromkeys(('dia', 'dias'), 'dia'),
+    **dict.fromkeys(('semana', 'semanas'), 'semana'),
+    **dict.fromkeys(('mês', 'meses'), 'mês'),
+    **dict.fromkeys(('ano', 'anos'), 'ano'),
+    **dict.fromkeys(('km', 'quilômetro', 'quilômetros'), 'km'),
+    **dict.fromkeys(('m', 'metro', 'metros'), 'm'),
+    **dict.fromkeys(('cm', 'centímetro', 'centímetros'), 'cm'),
+    **dict.fromkeys(('mm', 'milímetro', 'milímetros'), 'mm'),
+    **dict.fromkeys(('kg', 'quilo', 'quilos', 'quilograma', 'quilogramas'), 'kg'),
+    **dict.fromkeys(('g', 'grama', 'gramas'), 'g'),
+    **dict.fromkeys(('l', 'litro', 'litros'), 'L'),
+    **dict.fromkeys(('ml', 'mililitro', 'mililitros'), 'mL'),
+    **dict.fromkeys(('real', 'reais'), 'R$'),
+    **dict.fromkeys(('centavo', 'centavos'), 'centavo'),
+}
+
+# Limite de entradas distintas combinadas na busca de expressões
+_MAX_ENTRADAS = 6
+
+# Sorteios por variante antes de desistir
+_TENTATIVAS_POR_VARIANTE = 200
+
+_DENOMINADORES = (2, 3, 4, 5, 6, 8, 10)
+_SIMBOLOS = {'+': '+', '-': '-', '*': '×', '/': '÷', '^': '^'}
+
+
+# ---------------------------------------------------------------------------
+# Tokens
+# ---------------------------------------------------------------------------
+
+def tokenizar(texto: str) -> List[Token]:
+    """
+    Encontra os números de um texto.
+
+    Args:
+        texto: Texto qualquer (enunciado, passo ou gabarito)
+
+    Returns:
+        Lista de Token na ordem do texto
+    """
+    tokens = []
+    for m in _RE_TOKEN.finditer(texto or ""):
+        valor = numero_para_fracao(m.group(1))
+        if valor is None:
+            continue
+        tokens.append(Token(m.start(1), m.end(1), m.group(1), valor, bool(m.group(2))))
+    return tokens
+
+
+def _dimensao_token(texto: str, tok: Token) -> Tuple:
+    """
+    Unidade física de um número do texto, como tupla ordenada (unidade, expoente).
+
+    "60 km/h" -> (('h', -1), ('km', 1)); "R$ 12" -> (('R$', 1),); números sem
+    unidade física reconhecida (e porcentagens) -> ().
+    """
+    if tok.percentual:
+        return ()
+    if _RE_MOEDA_ANTES.search(texto[:tok.inicio]):
+        return (('R$', 1),)
+    m = _RE_UNIDADE.match(texto, tok.fim)
+    base = _UNIDADES.get(m.group(1).lower()) if m else None
+    if base is None:
+        return ()
+    dimensao = {base: 3 if m.group(2) == '³' else 2 if m.group(2) else 1}
+    divisor = _UNIDADES.get((m.group(3) or '').lower())
+    if divisor:
+        dimensao[divisor] = dimensao.get(divisor, 0) - 1
+    return tuple(sorted((u, e) for u, e in dimensao.items() if e))
+
+
+def _formatar_como(valor: Fraction, original: str) -> Optional[str]:
+    """
+    Escreve um valor no mesmo estilo de um token original.
+
+    Retorna None se o valor não couber no estilo (ex.: dízima periódica).
+    """
+    if '/' in original:
+        if valor.denominator == 1:
+            return str(valor.numerator)
+        return f"{valor.numerator}/{valor.denominator}"
+    decimais = re.search(r',(\d+)$', original) or (
+        re.search(r'\.(\d+)$', original) if not RE_MILHAR.fullmatch(original) else None)
+    casas = len(decimais.group(1)) if decimais else 0
+    for c in range(casas, 4):
+        if (valor * 10 ** c).denominator == 1:
+            texto = f"{float(valor):.{c}f}"
+            if ',' in original or '.' not in original or RE_MILHAR.fullmatch(original):
+                texto = texto.replace('.', ',')
+            return texto
+    return None
+
+
+def _formatar_livre(valor: Fraction) -> str:
+    """Escreve um valor como inteiro, decimal com vírgula ou fração."""
+    if valor.denominator == 1:
+        return str(valor.numerator)
+    texto = _formatar_como(valor, '0,0')
+    if texto is None:
+        return f"{valor.numerator}/{valor.denominator}"
+    return texto.rstrip('0').rstrip(',')
+
+
+def _substituir(texto: str, trocas: List[Tuple[Token, str]]) -> str:
+    """Aplica trocas de tokens em um texto, do fim para o início."""
+    for tok, novo in sorted(trocas, key=lambda par: par[0].inicio, reverse=True):
+        texto = texto[:tok.inicio] + novo + texto[tok.fim:]
+    return texto
+
+
+# ---------------------------------------------------------------------------
+# Expressões: ('atomo', chave) | ('c', valor) | (op, esquerda, direita)
+# ---------------------------------------------------------------------------
+
+def _raiz_exata(a: Fraction, k: int) -> Optional[Fraction]:
+    """Raiz k-ésima exata de um racional não negativo, ou None."""
+    if a < 0:
+        return None
+    partes = []
+    for x in (a.numerator, a.denominator):
+        r = round(x ** (1.0 / k))
+        achou = next((c for c in (r - 1, r, r + 1) if c >= 0 and c ** k == x), None)
+        if achou is None:
+            return None
+        partes.append(achou)
+    return Fraction(partes[0], partes[1])
+
+
+def _aplicar(op: str, a: Optional[Fraction], b: Optional[Fraction]) -> Optional[Fraction]:
+    """Aplica uma operação; retorna None se inválida ou grande demais."""
+    if a is None or b is None:
+        return None
+    if op == '+':
+        return a + b
+    if op == '-':
+        return a - b
+    if op == '*':
+        return a * b
+    if op == '/':
+        return a / b if b else None
+    if op == '^':
+        if b.denominator == 1 and 0 <= b <= 10 and abs(a) <= 10 ** 4:
+            return a ** int(b)
+        return None
+    if op == 'raiz':
+        if b in (2, 3):
+            return _raiz_exata(a, int(b))
+        return None
+    return None
+
+
+def _combinar_dimensoes(op: str, a: Optional[Tuple], b: Optional[Tuple],
+                        vb: Optional[Fraction]) -> Optional[Tuple]:
+    """
+    Dimensão do resultado de uma operação, ou None se as unidades não combinam.
+
+    Soma e subtração exigem a mesma unidade (minutos + horas é inválido);
+    potência e raiz exigem expoente adimensional e inteiro.
+    """
+    if a is None or b is None:
+        return None
+    if op in ('+', '-'):
+        return a if a == b else None
+    if op in ('*', '/'):
+        sinal = 1 if op == '*' else -1
+        dimensao = dict(a)
+        for u, e in b:
+            dimensao[u] = dimensao.get(u, 0) + sinal * e
+        return tuple(sorted((u, e) for u, e in dimensao.items() if e))
+    if b or vb is None or vb.denominator != 1 or vb == 0:
+        return None
+    k = int(vb)
+    if op == '^':
+        return tuple((u, e * k) for u, e in a)
+    if any(e % k for _, e in a):
+        return None
+    return tuple((u, e // k) for u, e in a)
+
+
+def _avaliar(expr: Tuple, ambiente: Dict) -> Optional[Fraction]:
+    """Avalia uma expressão em um ambiente {chave do átomo: valor}."""
+    if expr[0] == 'atomo':
+        return ambiente.get(expr[1])
+    if expr[0] == 'c':
+        return expr[1]
+    return _aplicar(expr[0], _avaliar(expr[1], ambiente), _avaliar(expr[2], ambiente))
+
+
+def _entradas(expr: Tuple) -> set:
+    """Índices das entradas do enunciado usadas pela expressão."""
+    if expr[0] == 'atomo':
+        return {expr[1][1]}
+    if expr[0] == 'c':
+        return set()
+    return _entradas(expr[1]) | _entradas(expr[2])
+
+
+def _ambiente(textos: List[str], percentuais: List[bool]) -> Dict:
+    """
+    Monta os átomos a partir do texto de cada entrada.
+
+    Toda entrada gera ('in', i); porcentagens geram também ('pct', i) = p/100
+    e frações escritas geram ('num', i) e ('den', i). Só ('in', i) carrega a
+    unidade da entrada (ver `_buscar_expressoes`).
+    """
+    amb = {}
+    for i, (texto, pct) in enumerate(zip(textos, percentuais)):
+        amb[('in', i)] = numero_para_fracao(texto)
+        if pct:
+            amb[('pct', i)] = amb[('in', i)] / 100
+        if '/' in texto:
+            n, d = texto.replace(' ', '').split('/')
+            amb[('num', i)] = Fraction(int(n))
+            amb[('den', i)] = Fraction(int(d))
+    return amb
+
+
+def _buscar_expressoes(ambiente: Dict, alvos: set,
+                       dimensoes: Optional[Dict[int, Tuple]] = None) -> Dict[Fraction, List[Tuple[int, Tuple]]]:
+    """
+    Procura expressões de até dois operadores que resultem em cada alvo.
+
+    Constantes só aparecem em formas com significado (1 ± p/100, ×100, ÷100,
+    quadrado/cubo e raízes), para evitar coincidências como 5 + 2 = 7.
+    Expressões que somam ou subtraem unidades diferentes são descartadas.
+
+    Args:
+        ambiente: Átomos (ver `_ambiente`)
+        alvos: Valores a explicar
+        dimensoes: Unidade de cada entrada (ver `_dimensao_token`); sem ela,
+            todas as entradas são adimensionais
+
+    Returns:
+        Dict valor -> lista de (profundidade, expressão)
+    """
+    dimensoes = dimensoes or {}
+    achados = {}
+
+    def registrar(prof, expr, valor, dim):
+        if valor is not None and dim is not None and valor in alvos:
+            achados.setdefault(valor, []).append((prof, expr))
+
+    nivel0 = [(('atomo', k), v, dimensoes.get(k[1], ()) if k[0] == 'in' else ())
+              for k, v in ambiente.items()]
+    for expr, v, d in nivel0:
+        registrar(0, expr, v, d)
+
+    nivel1 = []
+
+    def novo1(expr, valor, dim):
+        if valor is not None and dim is not None:
+            nivel1.append((expr, valor, dim))
+            registrar(1, expr, valor, dim)
+
+    um, cem = ('c', Fraction(1)), ('c', Fraction(100))
+    for ea, va, da in nivel0:
+        for eb, vb, db in nivel0:
+            if ea == eb:
+                novo1(('*', ea, eb), va * vb, _combinar_dimensoes('*', da, db, vb))
+                continue
+            for op in ('+', '-', '*', '/', '^', 'raiz'):
+                if op in ('+', '*') and ea[1] > eb[1]:
+                    continue
+                novo1((op, ea, eb), _aplicar(op, va, vb), _combinar_dimensoes(op, da, db, vb))
+        if ea[1][0] == 'pct':
+            novo1(('+', um, ea), 1 + va, da)
+            novo1(('-', um, ea), 1 - va, da)
+        else:
+            novo1(('*', ea, cem), va * 100, da)
+            novo1(('/', ea, cem), va / 100, da)
+        for k in (2, 3):
+            k = Fraction(k)
+            novo1(('^', ea, ('c', k)), _aplicar('^', va, k), _combinar_dimensoes('^', da, (), k))
+            novo1(('raiz', ea, ('c', k)), _aplicar('raiz', va, k), _combinar_dimensoes('raiz', da, (), k))
+
+    for e1, v1, d1 in nivel1:
+        for ea, va, da in nivel0:
+            for op in ('+', '-', '*', '/'):
+                registrar(2, (op, e1, ea), _aplicar(op, v1, va), _combinar_dimensoes(op, d1, da, va))
+                if op in ('-', '/'):
+                    registrar(2, (op, ea, e1), _aplicar(op, va, v1), _combinar_dimensoes(op, da, d1, v1))
+        registrar(2, ('*', e1, cem), v1 * 100, d1)
+        registrar(2, ('/', e1, cem), v1 / 100, d1)
+
+    for valor in achados:
+        achados[valor].sort(key=lambda par: par[0])
+    return achados
+
+
+def _mais_simples(achados: Dict, valor: Fraction) -> List[Tuple]:
+    """Expressões de menor profundidade que explicam um valor."""
+    lista = achados.get(valor)
+    if not lista:
+        return []
+    prof = lista[0][0]
+    return [e for p, e in lista if p == prof]
+
+
+# ---------------------------------------------------------------------------
+# Sorteio de novas entradas
+# ---------------------------------------------------------------------------
+
+def _sortear_inteiro(v: int, rng: random.Random) -> int:
+    """Sorteia um inteiro positivo na faixa de v, mantendo sua 'redondeza'."""
+    passo = 10 if v >= 10 and v % 10 == 0 else 5 if v >= 5 and v % 5 == 0 else 1
+    if v <= 10:
+        lo, hi = 2, max(10, 2 * v)
+    else:
+        lo, hi = max(passo, v // 2), max(v + passo, v * 3 // 2)
+    lo, hi = math.ceil(lo / passo), hi // passo
+    return rng.randint(lo, max(lo, hi)) * passo
+
+
+def _sortear_texto(texto: str, percentual: bool, rng: random.Random) -> str:
+    """Sorteia um novo valor para uma entrada, no mesmo estilo de escrita."""
+    t = texto.replace(' ', '')
+    if '/' in t:
+        n, d = (int(x) for x in t.split('/'))
+        # Numerador 1 só se o original também era unitário (ex.: 1/4)
+        minimo = 1 if n == 1 else 2
+        d2 = rng.choice([x for x in sorted(set(_DENOMINADORES) | {d}) if x > minimo])
+        if n < d:
+            n2 = rng.choice([k for k in range(minimo, d2) if math.gcd(k, d2) == 1])
+        else:
+            n2 = rng.choice([k for k in range(d2 + 1, 3 * d2) if math.gcd(k, d2) == 1])
+        return f"{n2}/{d2}"
+    valor = numero_para_fracao(t)
+    if percentual and valor.denominator == 1 and 0 < valor < 100:
+        if valor % 5 == 0:
+            return str(rng.randrange(5, 100, 5))
+        return str(rng.randint(1, 99))
+    decimais = re.search(r'[.,](\d+)$', t) if not RE_MILHAR.fullmatch(t) else None
+    casas = len(decimais.group(1)) if decimais else 0
+    escala = 10 ** casas
+    novo = Fraction(_sortear_inteiro(int(valor * escala), rng), escala)
+    return _formatar_como(novo, t)
+
+
+# ---------------------------------------------------------------------------
+# Geração
+# ---------------------------------------------------------------------------
+
+def _passos_da_expressao(expr: Tuple, ambiente: Dict, textos: List[str],
+                         gabarito: str) -> str:
+    """Escreve a resolução passo a passo a partir da árvore da expressão."""
+    passos = []
+
+    def escrever(e):
+        if e[0] == 'atomo':
+            chave = e[1]
+            if chave[0] == 'in':
+                return textos[chave[1]]
+            return _formatar_livre(ambiente[chave])
+        if e[0] == 'c':
+            return _formatar_livre(e[1])
+        a, b = escrever(e[1]), escrever(e[2])
+        texto = _formatar_livre(_avaliar(e, ambiente))
+        if e[0] == 'raiz':
+            passos.append(f"Passo {len(passos) + 1}: raiz de índice {b} de {a} = {texto}")
+        else:
+            passos.append(f"Passo {len(passos) + 1}: {a} {_SIMBOLOS[e[0]]} {b} = {texto}")
+        return texto
+
+    escrever(expr)
+    passos.append(f"Passo {len(passos) + 1}: Resposta: {gabarito}")
+    return "\n".join(passos)
+
+
+def _valido(novo: Fraction, original: Fraction) -> bool:
+    """Uma troca é válida se preserva sinal e integralidade do original."""
+    if novo is None:
+        return False
+    if original.denominator == 1 and novo.denominator != 1:
+        return False
+    if (original > 0) != (novo > 0) or (original < 0) != (novo < 0):
+        return False
+    return (novo * 1000).denominator == 1
+
+
+def gerar_variantes(enunciado: str, resolucao: str, gabarito_texto: str,
+                    quantidade: int = 5, seed: Optional[int] = None) -> List[Dict]:
+    """
+    Gera variantes numéricas de uma questão aprovada.
+
+    Cada variante troca os números do enunciado usados no cálculo da resposta
+    (exceto anos, como 2024) e recalcula gabarito e passos. Números dos
+    passos que não puderem ser explicados a partir do enunciado, respeitando
+    as unidades, fazem a resolução ser reescrita a partir da expressão da
+    resposta.
+
+    Args:
+        enunciado: Enunciado aprovado
+        resolucao: Resolução aprovada (passos "Passo X: ...")
+        gabarito_texto: Resposta correta aprovada
+        quantidade: Número desejado de variantes
+        seed: Seed para reprodutibilidade (opcional)
+
+    Returns:
+        Lista de dicts com 'enunciado', 'resolucao' e 'gabarito_texto';
+        vazia se a estrutura da questão não for reconhecida.
+    """
+    rng = random.Random(seed)
+
+    # Entradas: números distintos do enunciado (mesmo texto e unidade = mesma entrada)
+    tokens_enun = tokenizar(enunciado)
+    textos, percentuais, dimensoes, indice_token = [], [], {}, []
+    indices = {}
+    for tok in tokens_enun:
+        dimensao = _dimensao_token(enunciado, tok)
+        chave = (tok.texto.replace(' ', ''), tok.percentual, dimensao)
+        if chave not in indices:
+            indices[chave] = len(textos)
+            dimensoes[len(textos)] = dimensao
+            textos.append(tok.texto)
+            percentuais.append(tok.percentual)
+        indice_token.append(indices[chave])
+    if not textos or len(textos) > _MAX_ENTRADAS:
+        return []
+
+    tokens_gab = tokenizar(gabarito_texto)
+    if not tokens_gab:
+        return []
+    tok_resp = tokens_gab[0]
+
+    # Tokens dos passos (ignorando o "Passo X:")
+    linhas = resolucao.split('\n')
+    tokens_passos = []
+    for n_linha, linha in enumerate(linhas):
+        m = _RE_PASSO.match(linha)
+        deslocamento = m.start(2) if m else 0
+        for tok in tokenizar(linha[deslocamento:]):
+            tokens_passos.append((n_linha, tok._replace(inicio=tok.inicio + deslocamento,
+                                                        fim=tok.fim + deslocamento)))
+
+    ambiente = _ambiente(textos, percentuais)
+    alvos = {tok_resp.valor} | {tok.valor for _, tok in tokens_passos}
+    achados = _buscar_expressoes(ambiente, alvos, dimensoes)
+
+    exprs_resp = _mais_simples(achados, tok_resp.valor)
+    if not exprs_resp:
+        return []
+    exprs_passos = [_mais_simples(achados, tok.valor) for _, tok in tokens_passos]
+    reescrever_passos = any(not e for e in exprs_passos)
+
+    # Anos ficam fixos: sorteá-los gera datas sem sentido (2024 -> 1287)
+    variaveis = sorted(i for i in set().union(*(_entradas(e) for e in exprs_resp))
+                       if percentuais[i] or not _RE_ANO.fullmatch(textos[i]))
+    if not variaveis:
+        return []
+    vistos = {tuple(textos)}
+    variantes = []
+
+    for _ in range(quantidade * _TENTATIVAS_POR_VARIANTE):
+        if len(variantes) == quantidade:
+            break
+
+        novos_textos = list(textos)
+        for i in variaveis:
+            novos_textos[i] = _sortear_texto(textos[i], percentuais[i], rng)
+        if None in novos_textos or tuple(novos_textos) in vistos:
+            continue
+        novo_amb = _ambiente(novos_textos, percentuais)
+
+        # Resposta: todas as explicações mais simples devem concordar
+        novos_resp = {_avaliar(e, novo_amb) for e in exprs_resp}
+        if len(novos_resp) != 1:
+            continue
+        nova_resp = novos_resp.pop()
+        if not _valido(nova_resp, tok_resp.valor):
+            continue
+        texto_resp = _formatar_como(nova_resp, tok_resp.texto)
+        if texto_resp is None:
+            continue
+        novo_gabarito = _substituir(gabarito_texto, [(tok_resp, texto_resp)])
+
+        # Passos: substitui cada número pelo valor recalculado
+        trocas_por_linha = {}
+        ok = True
+        if not reescrever_passos:
+            for (n_linha, tok), exprs in zip(tokens_passos, exprs_passos):
+                novos = {_avaliar(e, novo_amb) for e in exprs}
+                novo = novos.pop() if len(novos) == 1 else None
+                texto = _formatar_como(novo, tok.texto) if _valido(novo, tok.valor) else None
+                if texto is None:
+                    ok = False
+                    break
+                trocas_por_linha.setdefault(n_linha, []).append((tok, texto))
+        if not ok:
+            continue
+
+        if reescrever_passos:
+            expr = exprs_resp[0]
+            nova_resolucao = _passos_da_expressao(expr, novo_amb, novos_textos, novo_gabarito)
+        else:
+            nova_resolucao = "\n".join(
+                _substituir(linha, trocas_por_linha.get(n, [])) for n, linha in enumerate(linhas))
+
+        trocas_enun = [(tok, novos_textos[i]) for tok, i in zip(tokens_enun, indice_token)
+                       if novos_textos[i] != textos[i]]
+        vistos.add(tuple(novos_textos))
+        variantes.append({
+            "enunciado": _substituir(enunciado, trocas_enun),
+            "resolucao": nova_resolucao,
+            "gabarito_texto": novo_gabarito,
+        })
+
+    return variantes